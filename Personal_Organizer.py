@@ -2,7 +2,14 @@ import streamlit as st
 from datetime import datetime, date, timedelta
 import calendar
 import pandas as pd
-import json
+import tempfile
+from export_jobs import ExportJobs, render_export_job
+from rerun_timing import render_timing_panel, start_rerun_timer
+from event_core import (
+    EVENT_EXPORT_FORMATS, RECURRENCES, EventStore, add_event, add_events, clear_events, delete_event,
+    edit_event, export_events, format_date, get_event_statistics, get_event_years, get_max_days,
+    get_month_events, make_recurrence, next_occurrence, search_events
+)
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +19,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-section rerun timings (?debug=1 or RERUN_TIMING=1)
+timer = start_rerun_timer("personal_organizer")
+
 # Enhanced Custom CSS with animations and gradients
 st.markdown("""
     <style>
@@ -371,14 +381,24 @@ st.markdown("""
     }
     </style>
 """, unsafe_allow_html=True)
+timer.split("CSS injection")
 
 # Initialize session state for storing events
 if 'events' not in st.session_state:
-    st.session_state.events = []
+    st.session_state.events = EventStore()
 
 if 'show_success' not in st.session_state:
     st.session_state.show_success = False
 
+# Each session's events are its own, and so are its export jobs
+if 'export_jobs' not in st.session_state:
+    st.session_state.export_jobs = ExportJobs()
+
+# Export files are written here
+@st.cache_resource
+def get_export_dir():
+    return tempfile.mkdtemp(prefix="personal_organizer_exports_")
+
 # Category and Priority options
 CATEGORIES = {
     "Work": "💼",
@@ -390,61 +410,8 @@ CATEGORIES = {
 
 PRIORITIES = ["Low", "Medium", "High"]
 
-# Function to validate if a year is a leap year
-def is_leap_year(year):
-    return (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0)
-
-# Function to get maximum days in a month
-def get_max_days(month, year):
-    if month == 2:
-        return 29 if is_leap_year(year) else 28
-    elif month in [4, 6, 9, 11]:
-        return 30
-    else:
-        return 31
-
-# Function to add an event
-def add_event(name, year, month, day, category, priority, notes=""):
-    event = {
-        'name': name,
-        'year': year,
-        'month': month,
-        'day': day,
-        'date': date(year, month, day),
-        'category': category,
-        'priority': priority,
-        'notes': notes,
-        'created_at': datetime.now()
-    }
-    st.session_state.events.append(event)
-    st.session_state.events.sort(key=lambda x: x['date'])
-
-# Function to delete an event
-def delete_event(index):
-    st.session_state.events.pop(index)
-
-# Function to edit an event
-def edit_event(index, name, year, month, day, category, priority, notes):
-    st.session_state.events[index] = {
-        'name': name,
-        'year': year,
-        'month': month,
-        'day': day,
-        'date': date(year, month, day),
-        'category': category,
-        'priority': priority,
-        'notes': notes,
-        'created_at': st.session_state.events[index].get('created_at', datetime.now())
-    }
-    st.session_state.events.sort(key=lambda x: x['date'])
-
-# Function to format date
-def format_date(year, month, day):
-    month_names = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
-    return f"{month_names[month - 1]} {day}, {year}"
+# The Calendar View offers the years recurring events repeat into, this many years ahead
+CALENDAR_YEARS_AHEAD = 5
 
 # Function to get category badge
 def get_category_badge(category):
@@ -477,17 +444,52 @@ def get_event_card_class(category):
     }
     return f"event-card {card_classes[category]}"
 
+# Function to show the inputs for how an event repeats and return the rule they give
+def recurrence_inputs(rule=None):
+    repeat_col, count_col, until_col = st.columns(3)
+    with repeat_col:
+        frequency = st.selectbox(
+            "🔁 Repeats",
+            options=["Never"] + RECURRENCES,
+            index=0 if rule is None else RECURRENCES.index(rule['frequency']) + 1
+        )
+    with count_col:
+        count = st.number_input(
+            "🔢 Times (0 = no limit)",
+            min_value=0,
+            value=0 if rule is None or rule['count'] is None else rule['count'],
+            step=1
+        )
+    with until_col:
+        until = st.date_input("🏁 Until (optional)", value=None if rule is None else rule['until'])
+    return make_recurrence(frequency, count, until)
+
+# Function to check a recurrence rule against the event's date; returns an error message, or None
+def recurrence_error(recurrence, year, month, day):
+    if recurrence and recurrence['until'] is not None and recurrence['until'] < date(year, month, day):
+        return "⚠️ The Until date is before the event's date!"
+    return None
+
+# Function to describe how an event repeats
+def describe_recurrence(rule):
+    description = f"🔁 Repeats {rule['frequency'].lower()}"
+    if rule['count'] is not None:
+        description += f", {rule['count']} times"
+    if rule['until'] is not None:
+        description += f", until {format_date(rule['until'].year, rule['until'].month, rule['until'].day)}"
+    return description
+
+# One pass over the events for every count on the page, reused until the events or the day change
+today = date.today()
+stats = get_event_statistics(st.session_state.events, today)
+
 # Sidebar
 with st.sidebar:
     st.markdown("# 🎯 Quick Stats")
     
-    total_events = len(st.session_state.events)
-    upcoming_events = sum(1 for event in st.session_state.events if event['date'] >= date.today())
-    past_events = total_events - upcoming_events
-    
-    st.metric("📊 Total Events", total_events)
-    st.metric("⏰ Upcoming", upcoming_events)
-    st.metric("✅ Past Events", past_events)
+    st.metric("📊 Total Events", stats['total'])
+    st.metric("⏰ Upcoming", stats['upcoming'])
+    st.metric("✅ Past Events", stats['past'])
     
     st.markdown("---")
     
@@ -496,13 +498,8 @@ with st.sidebar:
     # Priority breakdown
     st.markdown("### 🎯 By Priority")
     if st.session_state.events:
-        priority_counts = {}
-        for event in st.session_state.events:
-            pri = event['priority']
-            priority_counts[pri] = priority_counts.get(pri, 0) + 1
-        
         for priority in ["High", "Medium", "Low"]:
-            count = priority_counts.get(priority, 0)
+            count = stats['by_priority'].get(priority, 0)
             st.markdown(f"⚡ **{priority}**: {count}")
     else:
         st.info("No events yet")
@@ -517,14 +514,14 @@ with st.sidebar:
     if st.button("📥 Import Sample Data", use_container_width=True):
         sample_events = [
             {"name": "Team Meeting", "year": 2026, "month": 2, "day": 5, "category": "Work", "priority": "High", "notes": "Quarterly review"},
-            {"name": "Mom's Birthday", "year": 2026, "month": 3, "day": 15, "category": "Birthday", "priority": "High", "notes": "Don't forget the cake!"},
+            {"name": "Mom's Birthday", "year": 2026, "month": 3, "day": 15, "category": "Birthday", "priority": "High", "notes": "Don't forget the cake!", "recurrence": make_recurrence("Yearly")},
             {"name": "Vacation", "year": 2026, "month": 6, "day": 20, "category": "Holiday", "priority": "Medium", "notes": "Beach resort"},
         ]
-        for event in sample_events:
-            add_event(event['name'], event['year'], event['month'], event['day'], 
-                     event['category'], event['priority'], event['notes'])
+        add_events(st.session_state.events, sample_events)
         st.rerun()
 
+timer.split("sidebar")
+
 # Main app header
 st.markdown("""
     <div style='text-align: center; padding: 2rem 0;'>
@@ -608,15 +605,23 @@ with tab1:
                 height=100
             )
             
+            # Recurrence: stored once, shown on every date it falls on
+            recurrence = recurrence_inputs()
+            
             submit_button = st.form_submit_button("✨ Add Event", use_container_width=True)
             
             if submit_button:
-                if event_name.strip():
-                    add_event(event_name, year, month, day, category, priority, notes)
+                error = recurrence_error(recurrence, year, month, day)
+                if not event_name.strip():
+                    st.error("⚠️ Please enter an event name!")
+                elif error:
+                    st.error(error)
+                else:
+                    add_event(st.session_state.events, event_name, year, month, day, category, priority, notes, recurrence)
                     st.success(f"✅ Event '{event_name}' added successfully!")
                     st.rerun()
-                else:
-                    st.error("⚠️ Please enter an event name!")
+    
+    timer.split("add event form")
     
     # Right column - Display Events
     with col2:
@@ -626,7 +631,7 @@ with tab1:
         search_col, filter_col = st.columns(2)
         
         with search_col:
-            search_term = st.text_input("🔍 Search events", placeholder="Search by name...")
+            search_term = st.text_input("🔍 Search events", placeholder="Search names and notes...")
         
         with filter_col:
             filter_category = st.selectbox(
@@ -635,25 +640,23 @@ with tab1:
             )
         
         # Filter events
-        filtered_events = st.session_state.events
-        
-        if search_term:
-            filtered_events = [e for e in filtered_events if search_term.lower() in e['name'].lower()]
-        
-        if filter_category != "All":
-            filtered_events = [e for e in filtered_events if e['category'] == filter_category]
+        filtered_events = search_events(st.session_state.events, search_term, filter_category)
+        timer.split("search + filter")
         
         if filtered_events:
             st.markdown(f"**Showing {len(filtered_events)} of {len(st.session_state.events)} events**")
             
             # Display each event
-            for idx, event in enumerate(filtered_events):
-                # Find original index
-                original_idx = st.session_state.events.index(event)
+            for event in filtered_events:
+                # Widgets and edit state are keyed by the event's id, which never changes
+                event_id = event['id']
                 
                 with st.container():
-                    # Calculate days until event
-                    days_until = (event['date'] - date.today()).days
+                    # Calculate days until event; a recurring one counts to its next occurrence
+                    event_day = event['date']
+                    if event['recurrence']:
+                        event_day = next_occurrence(event, today) or event_day
+                    days_until = (event_day - today).days
                     
                     if days_until < 0:
                         status = f"🕒 {abs(days_until)} days ago"
@@ -676,8 +679,9 @@ with tab1:
                             {get_priority_badge(event['priority'])}
                         </p>
                         <p style="font-size: 1.1em; margin: 0.5rem 0;">
-                            📆 {format_date(event['year'], event['month'], event['day'])}
+                            📆 {format_date(event_day.year, event_day.month, event_day.day)}
                         </p>
+                        {f'<p style="margin: 0.5rem 0;">{describe_recurrence(event["recurrence"])}</p>' if event['recurrence'] else ''}
                         <p style="color: {status_color}; font-weight: bold; margin: 0.5rem 0;">
                             {status}
                         </p>
@@ -688,18 +692,19 @@ with tab1:
                     # Action buttons
                     action_col1, action_col2 = st.columns([1, 1])
                     with action_col1:
-                        if st.button("✏️ Edit", key=f"edit_{original_idx}", use_container_width=True):
-                            st.session_state[f'editing_{original_idx}'] = True
+                        if st.button("✏️ Edit", key=f"edit_{event_id}", use_container_width=True):
+                            st.session_state[f'editing_{event_id}'] = True
                             st.rerun()
                     
                     with action_col2:
-                        if st.button("🗑️ Delete", key=f"delete_{original_idx}", use_container_width=True):
-                            delete_event(original_idx)
+                        if st.button("🗑️ Delete", key=f"delete_{event_id}", use_container_width=True):
+                            delete_event(st.session_state.events, event_id)
+                            st.session_state.pop(f'editing_{event_id}', None)
                             st.rerun()
                     
                     # Edit form (shown when edit button clicked)
-                    if st.session_state.get(f'editing_{original_idx}', False):
-                        with st.form(key=f"edit_form_{original_idx}"):
+                    if st.session_state.get(f'editing_{event_id}', False):
+                        with st.form(key=f"edit_form_{event_id}"):
                             st.markdown("### Edit Event")
                             
                             edit_name = st.text_input("Event Name", value=event['name'])
@@ -734,81 +739,64 @@ with tab1:
                             
                             edit_notes = st.text_area("Notes", value=event.get('notes', ''))
                             
+                            edit_recurrence = recurrence_inputs(event['recurrence'])
+                            
                             save_col, cancel_col = st.columns(2)
                             with save_col:
                                 if st.form_submit_button("💾 Save", use_container_width=True):
-                                    edit_event(original_idx, edit_name, edit_year, edit_month, edit_day, 
-                                             edit_category, edit_priority, edit_notes)
-                                    st.session_state[f'editing_{original_idx}'] = False
-                                    st.rerun()
+                                    edit_error = recurrence_error(edit_recurrence, edit_year, edit_month, edit_day)
+                                    if edit_error:
+                                        st.error(edit_error)
+                                    else:
+                                        edit_event(st.session_state.events, event_id, edit_name, edit_year, edit_month, edit_day, 
+                                                 edit_category, edit_priority, edit_notes, edit_recurrence)
+                                        st.session_state[f'editing_{event_id}'] = False
+                                        st.rerun()
                             
                             with cancel_col:
                                 if st.form_submit_button("❌ Cancel", use_container_width=True):
-                                    st.session_state[f'editing_{original_idx}'] = False
+                                    st.session_state[f'editing_{event_id}'] = False
                                     st.rerun()
                     
                     st.markdown("---")
+            timer.split("event cards")
             
             # Export options
             st.markdown("### 📤 Export Options")
             
             col_csv, col_json, col_clear = st.columns(3)
             
-            with col_csv:
-                export_data = pd.DataFrame([
-                    {
-                        'Event': event['name'],
-                        'Date': format_date(event['year'], event['month'], event['day']),
-                        'Category': event['category'],
-                        'Priority': event['priority'],
-                        'Notes': event.get('notes', ''),
-                        'Year': event['year'],
-                        'Month': event['month'],
-                        'Day': event['day']
-                    }
-                    for event in filtered_events
-                ])
-                
-                csv = export_data.to_csv(index=False)
-                st.download_button(
-                    label="📥 CSV",
-                    data=csv,
-                    file_name="events.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            
-            with col_json:
-                json_data = json.dumps([
-                    {
-                        'name': event['name'],
-                        'date': format_date(event['year'], event['month'], event['day']),
-                        'category': event['category'],
-                        'priority': event['priority'],
-                        'notes': event.get('notes', '')
-                    }
-                    for event in filtered_events
-                ], indent=2)
-                
-                st.download_button(
-                    label="📥 JSON",
-                    data=json_data,
-                    file_name="events.json",
-                    mime="application/json",
-                    use_container_width=True
-                )
+            # Exports are written in the background; the buttons below only start them
+            export_key = (st.session_state.events.version, search_term, filter_category)
+            for export_col, export_format in zip((col_csv, col_json), EVENT_EXPORT_FORMATS):
+                with export_col:
+                    if st.button(f"📥 {export_format}", use_container_width=True):
+                        export_jobs = st.session_state.export_jobs
+                        export_jobs.discard(lambda key: key[0] == st.session_state.events.version)
+                        # A copy, so later edits cannot change the rows being written
+                        st.session_state.event_export_job = export_jobs.submit(
+                            (*export_key, export_format), export_events,
+                            list(filtered_events), export_format, get_export_dir()
+                        )
             
             with col_clear:
                 if st.button("🗑️ Clear All", use_container_width=True):
                     if st.session_state.get('confirm_clear', False):
-                        st.session_state.events = []
+                        clear_events(st.session_state.events)
                         st.session_state.confirm_clear = False
                         st.rerun()
                     else:
                         st.session_state.confirm_clear = True
                         st.warning("Click again to confirm")
+            
+            # Only offer the export that matches the events on screen now
+            export_job = st.session_state.get('event_export_job')
+            if export_job is not None and export_job.key[:-1] == export_key:
+                extension, mime = EVENT_EXPORT_FORMATS[export_job.key[-1]]
+                render_export_job(export_job, f"📄 Download {export_job.key[-1]}", f"events.{extension}", mime)
         else:
             st.info("📝 No events match your search. Try adjusting your filters!")
+    timer.split("export")
 
 # TAB 2: Analytics
 with tab2:
@@ -819,20 +807,16 @@ with tab2:
         metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
         
         with metric_col1:
-            st.metric("Total Events", len(st.session_state.events))
+            st.metric("Total Events", stats['total'])
         
         with metric_col2:
-            upcoming = sum(1 for e in st.session_state.events if e['date'] >= date.today())
-            st.metric("Upcoming", upcoming)
+            st.metric("Upcoming", stats['upcoming'])
         
         with metric_col3:
-            this_month = sum(1 for e in st.session_state.events 
-                           if e['date'].month == date.today().month and e['date'].year == date.today().year)
-            st.metric("This Month", this_month)
+            st.metric("This Month", stats['this_month'])
         
         with metric_col4:
-            high_priority = sum(1 for e in st.session_state.events if e['priority'] == "High")
-            st.metric("High Priority", high_priority)
+            st.metric("High Priority", stats['by_priority'].get("High", 0))
         
         st.markdown("---")
         
@@ -841,10 +825,7 @@ with tab2:
         
         with col_chart1:
             st.markdown("### 📁 Events by Category")
-            category_data = {}
-            for event in st.session_state.events:
-                cat = event['category']
-                category_data[cat] = category_data.get(cat, 0) + 1
+            category_data = stats['by_category']
             
             if category_data:
                 cat_df = pd.DataFrame(list(category_data.items()), columns=['Category', 'Count'])
@@ -852,10 +833,7 @@ with tab2:
         
         with col_chart2:
             st.markdown("### ⚡ Events by Priority")
-            priority_data = {}
-            for event in st.session_state.events:
-                pri = event['priority']
-                priority_data[pri] = priority_data.get(pri, 0) + 1
+            priority_data = stats['by_priority']
             
             if priority_data:
                 pri_df = pd.DataFrame(list(priority_data.items()), columns=['Priority', 'Count'])
@@ -865,11 +843,11 @@ with tab2:
         
         # Upcoming events timeline
         st.markdown("### 📅 Upcoming Events Timeline")
-        upcoming_events = [e for e in st.session_state.events if e['date'] >= date.today()][:5]
+        upcoming_events = stats['timeline']
         
         if upcoming_events:
             for event in upcoming_events:
-                days_until = (event['date'] - date.today()).days
+                days_until = (event['date'] - today).days
                 progress = max(0, min(100, 100 - (days_until * 2)))
                 
                 st.markdown(f"**{event['name']}** - {format_date(event['year'], event['month'], event['day'])}")
@@ -879,6 +857,7 @@ with tab2:
             st.info("No upcoming events")
     else:
         st.info("📊 Add some events to see analytics!")
+    timer.split("analytics")
 
 # TAB 3: Calendar View
 with tab3:
@@ -891,7 +870,7 @@ with tab3:
         with view_col1:
             view_year = st.selectbox(
                 "Select Year",
-                options=sorted(list(set(e['year'] for e in st.session_state.events))),
+                options=get_event_years(st.session_state.events, today.year + CALENDAR_YEARS_AHEAD),
                 index=0
             )
         
@@ -900,12 +879,11 @@ with tab3:
                 "Select Month",
                 options=list(range(1, 13)),
                 format_func=lambda x: calendar.month_name[x],
-                index=date.today().month - 1
+                index=today.month - 1
             )
         
         # Get events for selected month
-        month_events = [e for e in st.session_state.events 
-                       if e['year'] == view_year and e['month'] == view_month]
+        month_events = get_month_events(st.session_state.events, view_year, view_month)
         
         st.markdown(f"### {calendar.month_name[view_month]} {view_year}")
         st.markdown(f"**{len(month_events)} events this month**")
@@ -913,7 +891,7 @@ with tab3:
         # Display events
         if month_events:
             for event in month_events:
-                days_until = (event['date'] - date.today()).days
+                days_until = (event['date'] - today).days
                 
                 col1, col2, col3 = st.columns([1, 3, 2])
                 
@@ -941,6 +919,8 @@ with tab3:
     else:
         st.info("📅 Add events to see them in calendar view!")
 
+timer.split("calendar")
+
 # Footer
 st.markdown("""
     <div class="footer">
@@ -952,3 +932,7 @@ st.markdown("""
         </p>
     </div>
 """, unsafe_allow_html=True)
+timer.split("footer")
+
+timer.finish()
+render_timing_panel(timer)
@@ -0,0 +1,270 @@
+"""Benchmarks for Task Manager Pro and Personal Organizer Pro.
+
+Usage:
+    python benchmark.py [--sizes 1000 10000 100000 1000000] [--rerun-sizes 1000]
+                        [--repeat 5] [--output FILE] [--compare OLD.json]
+
+Each operation runs on synthetic data at every size. Its median, min and max
+latency and the peak traced memory of one extra call are written to JSON
+(bench_results/<commit>.json by default), so two commits can be compared
+with --compare. Full script reruns go through Streamlit's AppTest harness
+and are skipped when Streamlit is not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from event_core import (
+    RECURRENCES, EventStore, add_event, add_events, delete_event, edit_event, export_events,
+    get_event_statistics, get_events_between, get_month_events, make_recurrence, search_events
+)
+from task_core import (
+    SORT_OPTIONS, STATUSES, add_task, delete_task, delete_tasks, export_to_file, filter_tasks,
+    get_statistics, open_store, set_tasks_status, update_task_status
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = ["report", "meeting", "review", "deploy", "invoice", "call", "design", "cleanup", "release", "backup"]
+CATEGORIES = ["Work", "Personal", "Birthday", "Holiday", "Other"]
+EVENT_PRIORITIES = ["Low", "Medium", "High"]
+
+
+def make_task_rows(size, rng):
+    """Return size (name, priority, status, created_at) rows spread over a year"""
+    now = int(time.time())
+    return [
+        (f"{rng.choice(WORDS).title()} {i}", rng.randint(1, 5), rng.choice(STATUSES), now - rng.randrange(365 * 86400))
+        for i in range(size)
+    ]
+
+
+def make_events(size, rng):
+    """Return size events, shaped like add_event's, sorted by date"""
+    start = date(2000, 1, 1)
+    events = []
+    for i in range(size):
+        day = start + timedelta(days=rng.randrange(40 * 365))
+        events.append({
+            'name': f"{rng.choice(WORDS).title()} {i}",
+            'year': day.year,
+            'month': day.month,
+            'day': day.day,
+            'date': day,
+            'category': rng.choice(CATEGORIES),
+            'priority': rng.choice(EVENT_PRIORITIES),
+            'notes': "",
+            'created_at': datetime.now()
+        })
+    events.sort(key=lambda x: x['date'])
+    return events
+
+
+def measure(results, group, name, size, func, calls):
+    """Time func once per argument tuple, then trace the peak memory of one more call"""
+    timings = []
+    for args in calls[:-1]:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(*calls[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "group": group,
+        "name": name,
+        "size": size,
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "peak_kb": peak / 1024,
+    }
+    results.append(result)
+    print(f"{group:<10} {name:<32} {size:>9,} {result['median_ms']:>12.3f} ms {result['peak_kb']:>12.1f} KiB")
+
+
+def bench_tasks(results, size, repeat, rng, workdir):
+    store = open_store(os.path.join(workdir, f"tasks_{size}.db"))
+    scratch = open_store(os.path.join(workdir, f"scratch_{size}.db"))
+    rows = make_task_rows(size, rng)
+    # The timed load fills the benchmark store; the traced one goes to a scratch store
+    measure(results, "tasks", "add_many (bulk load)", size, lambda s, r: s.add_many(r),
+            [(store, rows), (scratch, rows)])
+    scratch.close()
+    del scratch
+
+    calls = repeat + 1
+    ids = rng.sample(list(store.tasks), 2 * calls)
+    measure(results, "tasks", "add_task", size, add_task,
+            [(store, f"Bench task {i}", 3, "Pending") for i in range(calls)])
+    measure(results, "tasks", "update_task_status", size, update_task_status,
+            [(store, task_id) for task_id in ids[:calls]])
+    measure(results, "tasks", "delete_task", size, delete_task,
+            [(store, task_id) for task_id in ids[calls:]])
+    batch_size = min(500, len(store) // (2 * calls))
+    batches = [rng.sample(list(store.tasks), batch_size) for _ in range(calls)]
+    measure(results, "tasks", f"set_tasks_status ({batch_size} ids)", size, set_tasks_status,
+            [(store, batch, "Completed") for batch in batches])
+    batches = [rng.sample(list(store.tasks), batch_size) for _ in range(calls)]
+    measure(results, "tasks", f"delete_tasks ({batch_size} ids)", size, delete_tasks,
+            [(store, batch) for batch in batches])
+    measure(results, "tasks", "get_statistics", size, get_statistics, [(store,)] * calls)
+    measure(results, "tasks", "filter (pending, critical)", size, filter_tasks,
+            [(store, ["Pending"], [1], None)] * calls)
+    measure(results, "tasks", "filter + sort, first page", size, filter_tasks,
+            [(store, None, None, SORT_OPTIONS[0], 0, 25)] * calls)
+    # A different query each call, so no call reuses the previous search
+    measure(results, "tasks", "search (substring), first page", size, filter_tasks,
+            [(store, None, None, "Relevance", 0, 25, WORDS[i % len(WORDS)][1:5]) for i in range(calls)])
+    measure(results, "tasks", "search (prefix), first page", size, filter_tasks,
+            [(store, None, None, "Relevance", 0, 25, WORDS[i % len(WORDS)][:2]) for i in range(calls)])
+    measure(results, "tasks", "search (two words), first page", size, filter_tasks,
+            [(store, ["Pending"], None, "Relevance", 0, 25, f"{WORDS[i % len(WORDS)]} {i}") for i in range(calls)])
+    for option in SORT_OPTIONS:
+        measure(results, "tasks", f"sort: {option}", size, filter_tasks, [(store, None, None, option)] * calls)
+    export_path = os.path.join(workdir, "export.csv")
+    measure(results, "tasks", "export CSV", size, export_to_file, [(store, "CSV", export_path)] * calls)
+    store.close()
+
+
+def bench_events(results, size, repeat, rng, workdir):
+    events = EventStore(make_events(size, rng))
+    calls = repeat + 1
+    measure(results, "events", "add_event", size, add_event,
+            [(events, f"Bench event {i}", 2030, 6, 15, "Work", "High", "") for i in range(calls)])
+    batch = make_events(1000, rng)
+    measure(results, "events", "add_events (1000 events)", size, add_events, [(events, batch)] * calls)
+    ids = rng.sample(list(events.by_id), 2 * calls)
+    measure(results, "events", "edit_event", size, edit_event,
+            [(events, event_id, "Edited", 2031, 1, 1, "Other", "Low", "") for event_id in ids[:calls]])
+    measure(results, "events", "delete_event", size, delete_event, [(events, event_id) for event_id in ids[calls:]])
+    measure(results, "events", "month events", size, get_month_events,
+            [(events, 2000 + rng.randrange(40), rng.randint(1, 12)) for _ in range(calls)])
+    measure(results, "events", "events in a 90-day range", size, get_events_between,
+            [(events, day, day + timedelta(days=90))
+             for day in (date(2000, 1, 1) + timedelta(days=rng.randrange(40 * 365)) for _ in range(calls))])
+    # A different day each call, so none reuses the previous statistics
+    measure(results, "events", "statistics", size, get_event_statistics,
+            [(events, date(2020, 1, 1) + timedelta(days=i)) for i in range(calls)])
+    measure(results, "events", "statistics (unchanged)", size, get_event_statistics,
+            [(events, date(2020, 1, 1))] * calls)
+    # A different query each call, so no call reuses the previous search
+    measure(results, "events", "search (substring)", size, search_events,
+            [(events, WORDS[i % len(WORDS)][1:5], "All") for i in range(calls)])
+    measure(results, "events", "search (prefix)", size, search_events,
+            [(events, WORDS[i % len(WORDS)][:2], "All") for i in range(calls)])
+    measure(results, "events", "search (word + category)", size, search_events,
+            [(events, WORDS[i % len(WORDS)], "Work") for i in range(calls)])
+    for export_format in ("CSV", "JSON"):
+        measure(results, "events", f"export {export_format}", size, export_events,
+                [(events.events, export_format, workdir)] * calls)
+
+    # Recurring events are stored once and expanded for the month or days asked for
+    recurring = make_events(1000, rng)
+    for event in recurring:
+        event['recurrence'] = make_recurrence(rng.choice(RECURRENCES))
+    add_events(events, recurring)
+    measure(results, "events", "month events (+1,000 recurring)", size, get_month_events,
+            [(events, 2000 + rng.randrange(40), rng.randint(1, 12)) for _ in range(calls)])
+    measure(results, "events", "statistics (+1,000 recurring)", size, get_event_statistics,
+            [(events, date(2020, 1, 1) + timedelta(days=i)) for i in range(calls)])
+
+
+def bench_reruns(results, size, repeat, rng, workdir):
+    try:
+        import streamlit as st
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("Streamlit is not installed; skipping script reruns")
+        return
+
+    # Task Manager reads its database from TASK_MANAGER_DB through a cached store
+    path = os.path.join(workdir, f"rerun_{size}.db")
+    store = open_store(path)
+    store.add_many(make_task_rows(size, rng))
+    store.close()
+    os.environ["TASK_MANAGER_DB"] = path
+    st.cache_resource.clear()
+    app = AppTest.from_file(os.path.join(HERE, "task_manager.py"), default_timeout=600)
+    app.run()  # warm up: the first run loads the store
+    measure(results, "rerun", "task_manager.py", size, lambda: app.run(), [()] * (repeat + 1))
+
+    events = EventStore(make_events(size, rng))
+    app = AppTest.from_file(os.path.join(HERE, "Personal_Organizer.py"), default_timeout=600)
+    app.session_state.events = events
+    app.run()
+    measure(results, "rerun", "Personal_Organizer.py", size, lambda: app.run(), [()] * (repeat + 1))
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, old_path):
+    """Print each result's median next to the same benchmark in an older run"""
+    with open(old_path) as f:
+        old = {(r["group"], r["name"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {old_path}:")
+    for r in results:
+        before = old.get((r["group"], r["name"], r["size"]))
+        if before:
+            ratio = r["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            print(f"{r['group']:<10} {r['name']:<32} {r['size']:>9,} "
+                  f"{before['median_ms']:>12.3f} -> {r['median_ms']:>12.3f} ms ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--rerun-sizes", type=int, nargs="*", default=[1_000],
+                        help="dataset sizes for AppTest script reruns (none to skip)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: bench_results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier JSON results file to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    commit = current_commit()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="task_bench_") as workdir:
+        for size in args.sizes:
+            bench_tasks(results, size, args.repeat, rng, workdir)
+            bench_events(results, size, args.repeat, rng, workdir)
+        for size in args.rerun_sizes:
+            bench_reruns(results, size, args.repeat, rng, workdir)
+
+    output = args.output or os.path.join(HERE, "bench_results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
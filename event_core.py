@@ -0,0 +1,533 @@
+"""Personal Organizer event operations, free of Streamlit.
+
+Events are dicts held by an EventStore; Personal_Organizer.py keeps one in
+st.session_state.events, benchmarks and scripts make their own. Every event
+has an id that never changes, and the store maps ids to events, so the page
+edits and deletes events by id rather than by list position. The store's list
+stays sorted by date as it changes: a new event is inserted at its place by
+binary search, an edit moves an event only when its date changes, and a large
+batch is sorted on its own and merged in with one pass over the list.
+Because the list is sorted, a month or any other date range is a slice found
+by binary search; the store also keeps a count of events per (year, month)
+and the sorted years that have events, updated with each change. The page's
+statistics come from one pass over the events, remembered until the events
+change or the day does. Search goes through an inverted index of the words
+and trigrams in each event's name and notes (task_search.SearchIndex, as on
+the task board), and the category filter through the ids of each category;
+the latest few results are remembered (task_search.SearchMemo).
+A recurring event is stored once, with its rule; its occurrences are made by
+generators, only for the range being looked at (a calendar month, the next
+few upcoming events), and a month-end or leap-day date falls on the last day
+of shorter months.
+Exports are written to files in chunks, reporting progress as they go, so
+they can run as background jobs (export_jobs.py).
+"""
+import csv
+import json
+import os
+import tempfile
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, date, timedelta
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+
+from task_search import SearchIndex, SearchMemo
+
+EXPORT_CHUNK_SIZE = 10_000
+
+# Events are ordered by date; events on the same day stay in the order they were added
+event_date = itemgetter('date')
+
+# Searches match words in an event's name and in its notes
+def search_text(event):
+    return f"{event['name']}\n{event.get('notes', '')}".lower()
+
+# Upcoming events shown on the Analytics timeline
+TIMELINE_SIZE = 5
+
+# How often a recurring event repeats
+RECURRENCES = ["Yearly", "Monthly", "Weekly"]
+
+# Batches smaller than 1/BATCH_FRACTION of the list are inserted event by event
+# with bisect; larger ones are merged in one pass
+BATCH_FRACTION = 8
+
+# Export format -> (file extension, MIME type)
+EVENT_EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSON": ("json", "application/json"),
+}
+
+# Function to validate if a year is a leap year
+def is_leap_year(year):
+    return (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0)
+
+# Function to get maximum days in a month
+def get_max_days(month, year):
+    if month == 2:
+        return 29 if is_leap_year(year) else 28
+    elif month in [4, 6, 9, 11]:
+        return 30
+    else:
+        return 31
+
+# Function to build a recurrence rule; None unless frequency is one of RECURRENCES
+def make_recurrence(frequency, count=None, until=None):
+    if frequency not in RECURRENCES:
+        return None
+    # count is the number of occurrences, the first included; until is the last possible date
+    return {'frequency': frequency, 'count': count or None, 'until': until}
+
+# Function to get the date of a recurring event's nth occurrence, counting the first as 0
+def nth_occurrence(event, n):
+    first = event['date']
+    if event['recurrence']['frequency'] == "Weekly":
+        return first + timedelta(weeks=n)
+    months = first.month - 1 + n * (12 if event['recurrence']['frequency'] == "Yearly" else 1)
+    year, month = first.year + months // 12, months % 12 + 1
+    # The 29th to 31st fall on the last day of shorter months, Feb 29 on Feb 28 outside leap years
+    return date(year, month, min(first.day, get_max_days(month, year)))
+
+# Function to get the index of a recurring event's first occurrence that can fall on or after day
+def occurrence_index(event, day):
+    first = event['date']
+    if day <= first:
+        return 0
+    if event['recurrence']['frequency'] == "Weekly":
+        return -(-(day - first).days // 7)
+    months = (day.year - first.year) * 12 + day.month - first.month
+    return months // (12 if event['recurrence']['frequency'] == "Yearly" else 1)
+
+# Function to get the index of a recurring event's last occurrence, or None if it never ends
+def last_occurrence_index(event):
+    rule = event['recurrence']
+    last = None if rule['count'] is None else rule['count'] - 1
+    if rule['until'] is not None:
+        index = occurrence_index(event, rule['until'])
+        if nth_occurrence(event, index) > rule['until']:
+            index -= 1
+        last = index if last is None else min(last, index)
+    return last
+
+# Function to generate the dates an event falls on from start to end, both included
+def occurrences(event, start=None, end=None):
+    first = event['date']
+    rule = event.get('recurrence')
+    if rule is None:
+        if (start is None or start <= first) and (end is None or first <= end):
+            yield first
+        return
+    if rule['until'] is not None and (end is None or rule['until'] < end):
+        end = rule['until']
+    # Skip straight to the first occurrence that can fall on or after start
+    n = 0 if start is None else occurrence_index(event, start)
+    while rule['count'] is None or n < rule['count']:
+        try:
+            day = nth_occurrence(event, n)
+        except (ValueError, OverflowError):  # past date.max
+            return
+        if end is not None and day > end:
+            return
+        if start is None or day >= start:
+            yield day
+        n += 1
+
+# Function to make the event as it falls on one of its occurrence dates
+def occurrence(event, day):
+    if day == event['date']:
+        return event
+    return dict(event, year=day.year, month=day.month, day=day.day, date=day)
+
+# Function to generate an event's occurrences from start to end, in date order
+def occurrence_events(event, start=None, end=None):
+    for day in occurrences(event, start, end):
+        yield occurrence(event, day)
+
+# Function to get the next date an event falls on, from today; None once it is over
+def next_occurrence(event, today):
+    return next(occurrences(event, today), None)
+
+# Function to build an event dict
+def make_event(event_id, name, year, month, day, category, priority, notes="", created_at=None, recurrence=None):
+    return {
+        'id': event_id,
+        'name': name,
+        'year': year,
+        'month': month,
+        'day': day,
+        'date': date(year, month, day),
+        'category': category,
+        'priority': priority,
+        'notes': notes,
+        'recurrence': recurrence,
+        'created_at': created_at or datetime.now()
+    }
+
+class EventStore:
+    """Events sorted by date, with a map from id to event
+
+    A recurring event sits in the list at its first date; between(),
+    in_month() and upcoming() replace it with its occurrences.
+    """
+
+    def __init__(self, events=()):
+        self.events = []
+        self.by_id = {}
+        self.next_id = 1
+        self.month_counts = {}  # (year, month) -> number of events
+        self.years = []  # sorted years that have events
+        self.by_category = {}  # category -> ids of its events
+        self.search_index = SearchIndex()
+        self.search_texts = {}  # id -> search_text(event), to check substring matches
+        self.recurring = {}  # id -> event, for the events with a recurrence rule
+        self.version = 0  # bumped on every change
+        self._stats_memo = (None, None)  # ((version, day), statistics)
+        self._search_memo = SearchMemo()  # latest (search term, category) -> events
+        if events:
+            self.add_many(events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def get(self, event_id):
+        return self.by_id.get(event_id)
+
+    def _position(self, event):
+        """Index of event in the list: a binary search for its date, then a scan of that day"""
+        index = bisect_left(self.events, event['date'], key=event_date)
+        while self.events[index] is not event:
+            index += 1
+        return index
+
+    def _count(self, event, delta):
+        """Add delta to the count of event's month, keeping the years in step"""
+        year, month = event['year'], event['month']
+        count = self.month_counts.get((year, month), 0) + delta
+        if count:
+            self.month_counts[(year, month)] = count
+        else:
+            del self.month_counts[(year, month)]
+        # Add or drop the year when its first month appears or its last one goes
+        index = bisect_left(self.years, year)
+        present = index < len(self.years) and self.years[index] == year
+        if not present:
+            self.years.insert(index, year)
+        elif not count and not any((year, other) in self.month_counts for other in range(1, 13)):
+            del self.years[index]
+
+    def statistics(self, today):
+        """Return every count the page shows, as of today, in a dict
+
+        Category and priority counts take one pass over the events; the
+        date counts are binary searches, as the events are sorted by date.
+        The result is reused until the version or today changes.
+        """
+        key, stats = self._stats_memo
+        if key == (self.version, today):
+            return stats
+        by_category, by_priority = {}, {}
+        for event in self.events:
+            by_category[event['category']] = by_category.get(event['category'], 0) + 1
+            by_priority[event['priority']] = by_priority.get(event['priority'], 0) + 1
+        first_upcoming = bisect_left(self.events, today, key=event_date)
+        # A recurring event is upcoming until its last occurrence, whatever its first date
+        upcoming = len(self.events) - first_upcoming + sum(
+            (next_occurrence(event, today) is not None) - (event['date'] >= today)
+            for event in self.recurring.values()
+        )
+        stats = {
+            'total': len(self.events),
+            'upcoming': upcoming,
+            'past': len(self.events) - upcoming,
+            'this_month': len(self.in_month(today.year, today.month)),
+            'by_category': by_category,
+            'by_priority': by_priority,
+            'timeline': list(islice(self.upcoming(today), TIMELINE_SIZE)),
+        }
+        self._stats_memo = ((self.version, today), stats)
+        return stats
+
+    def _new_event(self, *fields):
+        event = make_event(self.next_id, *fields)
+        self.next_id += 1
+        self.by_id[event['id']] = event
+        self._count(event, 1)
+        return event
+
+    def _index(self, event):
+        self.by_category.setdefault(event['category'], set()).add(event['id'])
+        text = self.search_texts[event['id']] = search_text(event)
+        self.search_index.add(event['id'], text)
+        if event['recurrence']:
+            self.recurring[event['id']] = event
+
+    def _unindex(self, event):
+        self.by_category[event['category']].discard(event['id'])
+        self.search_index.remove(event['id'], self.search_texts.pop(event['id']))
+        self.recurring.pop(event['id'], None)
+
+    def search(self, search_term, category="All"):
+        """Events matching every word of search_term, best matches first, in category
+
+        Equal matches, and every event when search_term has no words, come in
+        date order. The latest few results are kept until the events change.
+        """
+        return self._search_memo.get(
+            self.version, (search_term, category), lambda: self._search(search_term, category)
+        )
+
+    def _search(self, search_term, category):
+        scores = self.search_index.search(search_term, self.search_texts.__getitem__)
+        ids = None if category == "All" else self.by_category.get(category, set())
+        if scores is None:
+            return self.events if ids is None else [e for e in self.events if e['id'] in ids]
+        if ids is not None:
+            # Intersect the matches with the category, walking the smaller side
+            smaller = ids if len(ids) < len(scores) else scores
+            scores = {
+                event_id: scores[event_id] for event_id in smaller if event_id in ids and event_id in scores
+            }
+        events = sorted(map(self.by_id.__getitem__, sorted(scores)), key=event_date)
+        if len(set(scores.values())) > 1:
+            events.sort(key=lambda event: scores[event['id']], reverse=True)
+        return events
+
+    def between(self, start, end):
+        """Events and occurrences of recurring events from start to end, both included, in date order"""
+        events = self.events[
+            bisect_left(self.events, start, key=event_date):bisect_right(self.events, end, key=event_date)
+        ]
+        if not self.recurring:
+            return events
+        repeats = sorted(
+            (repeat for event in self.recurring.values() for repeat in occurrence_events(event, start, end)),
+            key=event_date
+        )
+        return list(merge((event for event in events if not event['recurrence']), repeats, key=event_date))
+
+    def in_month(self, year, month):
+        """Events and occurrences in one month, in date order"""
+        if (year, month) not in self.month_counts and not self.recurring:
+            return []
+        return self.between(date(year, month, 1), date(year, month, get_max_days(month, year)))
+
+    def upcoming(self, today):
+        """Generate the events and occurrences from today on, in date order, as they are needed"""
+        first_upcoming = bisect_left(self.events, today, key=event_date)
+        return merge(
+            (event for event in islice(self.events, first_upcoming, None) if not event['recurrence']),
+            *(occurrence_events(event, today) for event in self.recurring.values()),
+            key=event_date
+        )
+
+    def years_through(self, last_year):
+        """Sorted years with events, including those recurring events repeat into, up to last_year"""
+        if not self.recurring:
+            return list(self.years)
+        years = set(self.years)
+        for event in self.recurring.values():
+            # Recurring events fall in every year from their first occurrence to their last
+            last = last_occurrence_index(event)
+            if last is None:
+                years.update(range(event['year'], last_year + 1))
+            elif last >= 0:
+                years.update(range(event['year'], min(last_year, nth_occurrence(event, last).year) + 1))
+        return sorted(years)
+
+    def add(self, name, year, month, day, category, priority, notes="", recurrence=None):
+        event = self._new_event(name, year, month, day, category, priority, notes, None, recurrence)
+        insort(self.events, event, key=event_date)
+        self._index(event)
+        self.version += 1
+        return event
+
+    def add_many(self, new_events):
+        """Add dicts with the keys of add's arguments; returns the new events"""
+        batch = sorted(
+            (
+                self._new_event(event['name'], event['year'], event['month'], event['day'],
+                                event['category'], event['priority'], event.get('notes', ''),
+                                None, event.get('recurrence'))
+                for event in new_events
+            ),
+            key=event_date
+        )
+        if len(batch) * BATCH_FRACTION < len(self.events):
+            for event in batch:
+                insort(self.events, event, key=event_date)
+        else:
+            # The list is now two sorted runs, which the sort merges in one linear
+            # pass; being stable, it keeps existing events first on the same day
+            self.events.extend(batch)
+            self.events.sort(key=event_date)
+        # New ids are the largest yet, so the search index only appends to its lists
+        for event in batch:
+            self.by_category.setdefault(event['category'], set()).add(event['id'])
+            self.search_texts[event['id']] = search_text(event)
+            if event['recurrence']:
+                self.recurring[event['id']] = event
+        self.search_index.add_many(
+            (event['id'], self.search_texts[event['id']]) for event in sorted(batch, key=itemgetter('id'))
+        )
+        self.version += 1
+        return batch
+
+    def edit(self, event_id, name, year, month, day, category, priority, notes, recurrence=None):
+        old = self.by_id[event_id]
+        event = self.by_id[event_id] = make_event(
+            event_id, name, year, month, day, category, priority, notes, old.get('created_at'), recurrence
+        )
+        index = self._position(old)
+        if event['date'] == old['date']:
+            self.events[index] = event
+        else:
+            # Only a new date moves the event
+            self.events.pop(index)
+            insort(self.events, event, key=event_date)
+            self._count(event, 1)
+            self._count(old, -1)
+        self._unindex(old)
+        self._index(event)
+        self.version += 1
+        return event
+
+    def delete(self, event_id):
+        event = self.by_id.pop(event_id)
+        self.events.pop(self._position(event))
+        self._count(event, -1)
+        self._unindex(event)
+        self.version += 1
+
+    def clear(self):
+        self.events.clear()
+        self.by_id.clear()
+        self.month_counts.clear()
+        self.years.clear()
+        self.by_category.clear()
+        self.search_index = SearchIndex()
+        self.search_texts.clear()
+        self.recurring.clear()
+        self.version += 1
+
+# Function to add an event; recurrence is a rule from make_recurrence, or None
+def add_event(store, name, year, month, day, category, priority, notes="", recurrence=None):
+    return store.add(name, year, month, day, category, priority, notes, recurrence)
+
+# Function to add many events at once; each is a dict with the keys of add_event's arguments
+def add_events(store, new_events):
+    return store.add_many(new_events)
+
+# Function to delete an event by id
+def delete_event(store, event_id):
+    store.delete(event_id)
+
+# Function to edit an event by id
+def edit_event(store, event_id, name, year, month, day, category, priority, notes, recurrence=None):
+    return store.edit(event_id, name, year, month, day, category, priority, notes, recurrence)
+
+# Function to delete every event
+def clear_events(store):
+    store.clear()
+
+# Function to get the events of one month, recurring ones on each date they fall on
+def get_month_events(store, year, month):
+    return store.in_month(year, month)
+
+# Function to get the events between two dates, both included, recurring ones on each date they fall on
+def get_events_between(store, start, end):
+    return store.between(start, end)
+
+# Function to get the years that have events, in order, those of recurring events up to last_year
+def get_event_years(store, last_year=None):
+    return store.years_through(date.today().year if last_year is None else last_year)
+
+# Function to get the event statistics as of today
+def get_event_statistics(store, today=None):
+    return store.statistics(today or date.today())
+
+# Function to search events by name and filter by category
+def search_events(store, search_term="", category="All"):
+    return store.search(search_term, category)
+
+# Function to format date
+def format_date(year, month, day):
+    month_names = [
+        "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December"
+    ]
+    return f"{month_names[month - 1]} {day}, {year}"
+
+# One event in the JSON export, indented as in a list dumped with indent=2
+JSON_ITEM = (
+    '  {{\n    "name": {},\n    "date": {},\n    "category": {},\n    "priority": {},\n    "notes": {}\n  }}'
+)
+
+# Function to write events to a CSV file, one chunk at a time
+def write_events_csv(events, path, progress=None):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(['Event', 'Date', 'Category', 'Priority', 'Notes', 'Year', 'Month', 'Day'])
+        for start in range(0, len(events), EXPORT_CHUNK_SIZE):
+            writer.writerows(
+                (
+                    event['name'],
+                    format_date(event['year'], event['month'], event['day']),
+                    event['category'],
+                    event['priority'],
+                    event.get('notes', ''),
+                    event['year'],
+                    event['month'],
+                    event['day']
+                )
+                for event in events[start:start + EXPORT_CHUNK_SIZE]
+            )
+            if progress:
+                progress(min(start + EXPORT_CHUNK_SIZE, len(events)), len(events))
+
+# Function to write events to a JSON file, laid out like json.dumps(..., indent=2)
+def write_events_json(events, path, progress=None):
+    # Every value is a string, so each item is a fixed layout around encoded strings;
+    # json.dumps with indent would fall back to the much slower pure Python encoder
+    encode = json.encoder.encode_basestring_ascii
+    with open(path, "w", encoding="utf-8") as f:
+        if not events:
+            f.write("[]")
+        for start in range(0, len(events), EXPORT_CHUNK_SIZE):
+            items = ",\n".join(
+                JSON_ITEM.format(
+                    encode(event['name']),
+                    encode(format_date(event['year'], event['month'], event['day'])),
+                    encode(event['category']),
+                    encode(event['priority']),
+                    encode(event.get('notes', ''))
+                )
+                for event in events[start:start + EXPORT_CHUNK_SIZE]
+            )
+            f.write(("[\n" if start == 0 else ",\n") + items)
+            if progress:
+                progress(min(start + EXPORT_CHUNK_SIZE, len(events)), len(events))
+        if events:
+            f.write("\n]")
+
+EVENT_WRITERS = {
+    "CSV": write_events_csv,
+    "JSON": write_events_json,
+}
+
+# Function to export events to a new file in directory and return its path
+def export_events(events, export_format, directory, progress=None):
+    extension, _ = EVENT_EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(prefix="events_", suffix=f".{extension}", dir=directory)
+    os.close(fd)
+    if progress:
+        progress(0, len(events))
+    try:
+        EVENT_WRITERS[export_format](events, path, progress)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
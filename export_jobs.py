@@ -0,0 +1,133 @@
+"""Background export jobs for both apps.
+
+Exports run on a small thread pool shared by the process, so a rerun never
+waits for a large file to be written. A job reports its progress as it goes;
+the page keeps the job in session state and polls it from a fragment until
+the file is ready to download. Jobs are keyed by the data version plus
+whatever selects the rows, and a finished job is handed out again for the
+same key, so a repeat download reuses the file instead of writing it again.
+The file is read only when its download button is clicked, never on a rerun
+that merely shows the button. Files are counted by the jobs that hold them
+and deleted when the last such job is gone, from the registry and from every
+session that could still be showing its download button.
+"""
+import os
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+POLL_SECONDS = 0.5
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="export")
+
+
+class ExportJob:
+    """One export running, or finished, in the background"""
+
+    def __init__(self, key):
+        self.key = key
+        self.done_rows = 0
+        self.total_rows = 0
+        self.path = None
+        self.error = None
+        self.future = None
+
+    def report(self, done_rows, total_rows):
+        """Progress callback for the export: rows written so far, of total_rows"""
+        self.done_rows, self.total_rows = done_rows, total_rows
+
+    @property
+    def progress(self):
+        """Fraction of the rows written, from 0.0 to 1.0"""
+        return min(1.0, self.done_rows / self.total_rows) if self.total_rows else 0.0
+
+    @property
+    def finished(self):
+        return self.future is not None and self.future.done()
+
+    def read(self):
+        """Return the finished file's contents"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def _run(self, export, args, hold):
+        try:
+            self.path = export(*args, progress=self.report)
+        except Exception as e:
+            self.error = e
+        else:
+            hold(self)
+
+
+class ExportJobs:
+    """Export jobs by key; a finished job is reused while its file exists"""
+
+    def __init__(self):
+        self.jobs = {}
+        # Reentrant: dropping the last reference to a job while holding it
+        # runs _release on this same thread
+        self.lock = threading.RLock()
+        self.holders = Counter()  # path -> jobs alive that hold the file
+
+    def submit(self, key, export, *args):
+        """Run export(*args, progress=...) in the background unless key already has a job
+
+        export must return the path of the file it wrote. Returns the job.
+        """
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and job.error is None and (not job.finished or os.path.exists(job.path)):
+                return job
+            job = self.jobs[key] = ExportJob(key)
+            job.future = _executor.submit(job._run, export, args, self._hold)
+        return job
+
+    def discard(self, keep):
+        """Forget finished jobs whose key fails keep(key)
+
+        Their files are deleted once no session holds the jobs either.
+        """
+        with self.lock:
+            for key, job in list(self.jobs.items()):
+                if job.finished and not keep(key):
+                    del self.jobs[key]
+
+    def _hold(self, job):
+        """Count job as a holder of its file until the job itself is garbage"""
+        with self.lock:
+            self.holders[job.path] += 1
+        weakref.finalize(job, self._release, job.path)
+
+    def _release(self, path):
+        with self.lock:
+            self.holders[path] -= 1
+            if self.holders[path]:
+                return
+            del self.holders[path]
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def render_export_job(job, label, file_name, mime):
+    """Show a job's progress until it finishes, then a button to download its file
+
+    While the job runs, only this fragment reruns, every POLL_SECONDS; once
+    it finishes, one full rerun stops the polling.
+    """
+    import streamlit as st
+    polling = not job.finished
+
+    @st.fragment(run_every=POLL_SECONDS if polling else None)
+    def export_status():
+        if not job.finished:
+            st.progress(job.progress, text=f"⏳ Exporting... {job.done_rows:,} of {job.total_rows:,} rows")
+        elif polling:
+            st.rerun()
+        elif job.error is not None:
+            st.error(f"❌ Export failed: {job.error}")
+        else:
+            st.download_button(label=label, data=job.read, file_name=file_name, mime=mime)
+
+    export_status()
@@ -0,0 +1,60 @@
+"""Compare the memory used by dict tasks and compact Task objects.
+
+Usage: python memory_report.py [--sizes 10000 100000 1000000]
+
+The dict layout is the original session-state one (formatted created_at
+string); Task is the __slots__ class the store keeps in memory. Names repeat
+every 5,000 tasks, as recurring tasks do on a real board.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from task_store import STATUSES, Task
+
+
+def make_dict_task(i, now):
+    return {
+        "id": i,
+        "name": f"Task {i % 5000}",
+        "priority": i % 5 + 1,
+        "status": STATUSES[i % 2],
+        "created_at": datetime.fromtimestamp(now - i).strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def make_compact_task(i, now):
+    return Task(i, f"Task {i % 5000}", i % 5 + 1, STATUSES[i % 2], now - i)
+
+
+def measure(factory, size):
+    """Return the bytes allocated to hold size tasks in an id-keyed dict"""
+    now = int(time.time())
+    gc.collect()
+    tracemalloc.start()
+    tasks = {i: factory(i, now) for i in range(1, size + 1)}
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10} {'dict MB':>10} {'Task MB':>10} {'dict B/task':>12} {'Task B/task':>12} {'saving':>8}")
+    for size in args.sizes:
+        dict_bytes = measure(make_dict_task, size)
+        task_bytes = measure(make_compact_task, size)
+        print(
+            f"{size:>10,} {dict_bytes / 2**20:>10.1f} {task_bytes / 2**20:>10.1f} "
+            f"{dict_bytes / size:>12.0f} {task_bytes / size:>12.0f} {1 - task_bytes / dict_bytes:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Per-section timing of Streamlit reruns for both apps.
+
+Timing is off unless the page is opened with ?debug=1 or RERUN_TIMING=1 is
+set; while off, every call is a no-op. When on, each completed rerun is
+appended to <dir>/<app>.jsonl and the p50/p95/p99 of the last 1,000 reruns
+per section are rewritten to <dir>/<app>.prom in Prometheus text format,
+where <dir> is RERUN_METRICS_DIR (default "metrics"). The debug panel can
+profile the next rerun with cProfile; RERUN_PROFILE=1 profiles every rerun.
+Only one profiler runs at a time, so a fragment timed inside a profiled page
+is timed but not profiled separately.
+Reruns cut short by st.rerun() are not recorded.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict, deque
+
+METRICS_DIR = os.environ.get("RERUN_METRICS_DIR", "metrics")
+WINDOW = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (app, section) -> durations in seconds of the last WINDOW reruns in this process
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_lock = threading.Lock()
+# Weak reference to the timer whose profiler is enabled. Only one cProfile
+# profiler can run at a time: Python 3.12 refuses a second one, and earlier
+# versions let it silently take over from the first. The reference is weak so
+# a rerun cut short before finish() does not hold the profiler forever.
+_profiling = None
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class RerunTimer:
+    """Charges the time between split() calls to named sections of one rerun"""
+
+    def __init__(self, app, enabled=False, profile=False):
+        self.app = app
+        self.enabled = enabled or profile
+        self.sections = {}
+        self.profile_path = None
+        self.profiler = cProfile.Profile() if profile and _claim_profiler(self) else None
+        if self.profiler:
+            self.profiler.enable()
+        self.start = self.last = time.perf_counter()
+
+    def split(self, section):
+        """Charge the time since the previous split to section"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.sections[section] = self.sections.get(section, 0.0) + now - self.last
+        self.last = now
+
+    def finish(self):
+        """Record the rerun's timings and dump its profile, if any"""
+        if not self.enabled:
+            return
+        self.sections["total"] = time.perf_counter() - self.start
+        if self.profiler:
+            self.profiler.disable()
+            _release_profiler(self)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with _lock:
+            for section, seconds in self.sections.items():
+                _samples[(self.app, section)].append(seconds)
+            with open(os.path.join(METRICS_DIR, f"{self.app}.jsonl"), "a") as f:
+                f.write(json.dumps({
+                    "app": self.app,
+                    "time": time.time(),
+                    "sections_ms": {section: seconds * 1000 for section, seconds in self.sections.items()},
+                }) + "\n")
+            self._write_prometheus()
+        if self.profiler:
+            self.profile_path = os.path.join(METRICS_DIR, f"{self.app}_{time.strftime('%Y%m%d_%H%M%S')}.pstats")
+            self.profiler.dump_stats(self.profile_path)
+
+    def rollups(self):
+        """Return {section: (p50, p95, p99, count)} in seconds for this app"""
+        with _lock:
+            samples = {section: sorted(values) for (app, section), values in _samples.items() if app == self.app}
+        return {
+            section: (*(percentile(values, q) for q in QUANTILES), len(values))
+            for section, values in samples.items()
+        }
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP streamlit_rerun_section_seconds Time spent in each section of a rerun.",
+            "# TYPE streamlit_rerun_section_seconds summary",
+        ]
+        for (app, section), values in sorted(_samples.items()):
+            if app != self.app:
+                continue
+            labels = f'app="{app}",section="{section}"'
+            ordered = sorted(values)
+            for q in QUANTILES:
+                lines.append(f'streamlit_rerun_section_seconds{{{labels},quantile="{q}"}} {percentile(ordered, q):.6f}')
+            lines.append(f"streamlit_rerun_section_seconds_sum{{{labels}}} {sum(values):.6f}")
+            lines.append(f"streamlit_rerun_section_seconds_count{{{labels}}} {len(values)}")
+        path = os.path.join(METRICS_DIR, f"{self.app}.prom")
+        with open(path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)
+
+
+def _claim_profiler(timer):
+    """Make timer the one profiling, unless another timer (say, the page around a fragment) already is"""
+    global _profiling
+    with _lock:
+        if _profiling is not None and _profiling() is not None:
+            return False
+        _profiling = weakref.ref(timer)
+        return True
+
+
+def _release_profiler(timer):
+    global _profiling
+    with _lock:
+        if _profiling is not None and _profiling() is timer:
+            _profiling = None
+
+
+def start_rerun_timer(app):
+    """Start timing this rerun if ?debug=1, RERUN_TIMING=1 or a profile request says so"""
+    import streamlit as st
+    enabled = os.environ.get("RERUN_TIMING") == "1" or st.query_params.get("debug") == "1"
+    profile = st.session_state.pop("profile_next_rerun", False) or os.environ.get("RERUN_PROFILE") == "1"
+    return RerunTimer(app, enabled, profile)
+
+
+def render_timing_panel(timer):
+    """Show this rerun's section timings and the rollups in a sidebar expander"""
+    if not timer.enabled:
+        return
+    import streamlit as st
+    rollups = timer.rollups()
+    with st.sidebar.expander("🐞 Rerun Timings"):
+        st.dataframe(
+            [
+                {
+                    "Section": section,
+                    "This rerun (ms)": round(seconds * 1000, 2),
+                    "p50 (ms)": round(rollups[section][0] * 1000, 2),
+                    "p95 (ms)": round(rollups[section][1] * 1000, 2),
+                    "p99 (ms)": round(rollups[section][2] * 1000, 2),
+                    "Reruns": rollups[section][3]
+                }
+                for section, seconds in timer.sections.items()
+            ],
+            hide_index=True
+        )
+        if timer.profile_path:
+            st.caption(f"Profile saved to {timer.profile_path}")
+        st.button(
+            "⏱️ Profile Next Rerun",
+            on_click=lambda: st.session_state.update(profile_next_rerun=True)
+        )
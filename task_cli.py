@@ -0,0 +1,135 @@
+"""Command line for Task Manager Pro, on the same store as the Streamlit page.
+
+Examples:
+    python task_cli.py add "Write report" --priority 2
+    python task_cli.py list --status Pending --sort date
+    python task_cli.py list --search report
+    python task_cli.py toggle 3
+    python task_cli.py complete 4 7 9
+    python task_cli.py export tasks.parquet --format Parquet
+    python task_cli.py import old_tracker.csv
+    python task_cli.py undo
+
+The database is TASK_MANAGER_DB (default tasks.db) unless --db is given.
+"""
+import argparse
+import sys
+
+from task_core import (
+    EXPORT_FORMATS, PRIORITIES, PRIORITY_LABEL, STATUSES, ConflictError, add_task, clear_tasks,
+    delete_tasks, export_to_file, filter_tasks, format_created_at, get_statistics, import_file,
+    open_store, redo_change, set_tasks_status, undo_change, update_task_status
+)
+
+SORT_NAMES = {
+    "priority": "Priority (High to Low)",
+    "priority-low": "Priority (Low to High)",
+    "status": "Status",
+    "date": "Date Created",
+    "relevance": "Relevance",
+}
+
+
+def add_filter_arguments(parser):
+    parser.add_argument("--status", nargs="+", choices=STATUSES, help="only these statuses")
+    parser.add_argument("--priority", nargs="+", type=int, choices=PRIORITIES, help="only these priorities")
+    parser.add_argument("--sort", choices=SORT_NAMES,
+                        help="sort order (default: relevance when searching, else insertion order)")
+    parser.add_argument("--search", help="only tasks whose names match these words or word parts")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage Task Manager Pro tasks from the command line.")
+    parser.add_argument("--db", help="path of the SQLite task database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("name")
+    add.add_argument("--priority", type=int, choices=PRIORITIES, default=3)
+    add.add_argument("--status", choices=STATUSES, default="Pending")
+
+    listing = commands.add_parser("list", help="list tasks")
+    add_filter_arguments(listing)
+    listing.add_argument("--limit", type=int, help="show at most this many tasks")
+
+    toggle = commands.add_parser("toggle", help="toggle a task between Pending and Completed")
+    toggle.add_argument("id", type=int)
+
+    complete = commands.add_parser("complete", help="mark tasks Completed")
+    complete.add_argument("ids", type=int, nargs="+", metavar="id")
+
+    reopen = commands.add_parser("reopen", help="mark tasks Pending")
+    reopen.add_argument("ids", type=int, nargs="+", metavar="id")
+
+    delete = commands.add_parser("delete", help="delete tasks")
+    delete.add_argument("ids", type=int, nargs="+", metavar="id")
+
+    commands.add_parser("clear", help="delete every task")
+    commands.add_parser("undo", help="undo the latest change")
+    commands.add_parser("redo", help="redo the change undone last")
+    commands.add_parser("stats", help="show task statistics")
+
+    export = commands.add_parser("export", help="export tasks to a file")
+    export.add_argument("path")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="CSV")
+    add_filter_arguments(export)
+
+    load = commands.add_parser("import", help="bulk import tasks from a CSV or JSON file")
+    load.add_argument("path")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = open_store(args.db)
+
+    if args.command == "add":
+        if not add_task(store, args.name, args.priority, args.status):
+            sys.exit("Task name cannot be empty")
+    elif args.command == "list":
+        for task in filter_tasks(
+            store, args.status, args.priority, SORT_NAMES.get(args.sort), limit=args.limit, search=args.search
+        ):
+            print(f"{task.id:>6}  {task.status:<9}  {PRIORITY_LABEL[task.priority]:<8}  "
+                  f"{format_created_at(task.created_at)}  {task.name}")
+    elif args.command == "toggle" and store.get(args.id) is None:
+        sys.exit(f"No task with id {args.id}")
+    elif args.command == "toggle":
+        update_task_status(store, args.id)
+    elif args.command in ("complete", "reopen", "delete"):
+        missing = [task_id for task_id in args.ids if store.get(task_id) is None]
+        if missing:
+            sys.exit(f"No task with id {', '.join(map(str, missing))}")
+        if args.command == "delete":
+            delete_tasks(store, args.ids)
+        else:
+            set_tasks_status(store, args.ids, "Completed" if args.command == "complete" else "Pending")
+    elif args.command == "clear":
+        clear_tasks(store)
+    elif args.command in ("undo", "redo"):
+        try:
+            label = (undo_change if args.command == "undo" else redo_change)(store)
+        except ConflictError as e:
+            sys.exit(str(e))
+        print(f"{'Undid' if args.command == 'undo' else 'Redid'}: {label}" if label else f"Nothing to {args.command}")
+    elif args.command == "stats":
+        total, completed, pending = get_statistics(store)
+        print(f"Total: {total}  Completed: {completed}  Pending: {pending}")
+    elif args.command == "export":
+        export_to_file(
+            store, args.format, args.path, args.status, args.priority, SORT_NAMES.get(args.sort), args.search
+        )
+    elif args.command == "import":
+        with open(args.path, "rb") as f:
+            try:
+                imported, rejected = import_file(store, f, args.path)
+            except ValueError as e:
+                sys.exit(f"Could not import {args.path}: {e}")
+        print(f"Imported {len(imported)} tasks, rejected {len(rejected)} rows")
+        if len(rejected):
+            print(rejected.to_string(index=False))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
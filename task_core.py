@@ -0,0 +1,107 @@
+"""Task Manager Pro operations, free of Streamlit.
+
+The Streamlit page, the command line (task_cli.py) and the benchmarks all go
+through these functions. Importing this module loads neither Streamlit nor
+pandas; pandas is only imported by a bulk import.
+"""
+import os
+
+from task_export import EXPORT_FORMATS, WRITERS, available_formats, export_tasks, task_rows
+from task_store import PRIORITIES, STATUSES, ConflictError, TaskStore, format_created_at
+
+PRIORITY_LABEL = {
+    1: "Critical",
+    2: "High",
+    3: "Medium",
+    4: "Low",
+    5: "Very Low"
+}
+
+SORT_OPTIONS = ["Priority (High to Low)", "Priority (Low to High)", "Status", "Date Created"]
+
+# Search results can also be ranked by how well they match
+RELEVANCE = "Relevance"
+
+
+def open_store(path=None):
+    """Open the task store at path, or at $TASK_MANAGER_DB (default tasks.db)"""
+    return TaskStore(path or os.environ.get("TASK_MANAGER_DB", "tasks.db"))
+
+def validate_priority(priority):
+    """Validate priority is between 1 and 5"""
+    return 1 <= priority <= 5
+
+def validate_status(status):
+    """Validate status is either Pending or Completed"""
+    return status in STATUSES
+
+def add_task(store, name, priority, status):
+    """Add a new task to the task store"""
+    if name.strip():  # Check if task name is not empty
+        store.add(name, priority, status)
+        return True
+    return False
+
+def delete_task(store, task_id, version=None):
+    """Delete a task by ID; raises ConflictError if it is no longer at version"""
+    store.delete(task_id, version)
+
+def update_task_status(store, task_id, version=None):
+    """Toggle task status between Pending and Completed; raises ConflictError if it is no longer at version"""
+    store.toggle(task_id, version)
+
+def set_tasks_status(store, task_ids, status, versions=None):
+    """Set many tasks to status in one mutation; returns the ids left alone because they changed"""
+    return store.set_status_many(task_ids, status, versions)
+
+def delete_tasks(store, task_ids, versions=None):
+    """Delete many tasks in one mutation; returns the ids left alone because they changed"""
+    return store.delete_many(task_ids, versions)
+
+def clear_tasks(store):
+    """Delete every task"""
+    store.clear()
+
+def board_version(store):
+    """Return the store's data version after picking up other processes' writes"""
+    return store.sync()
+
+def undo_change(store, seq=None):
+    """Undo the latest change to the board; returns its label, or None if there is none
+
+    With seq, from change_history(), raises ConflictError unless that change is still the latest.
+    """
+    return store.undo(seq)
+
+def redo_change(store, seq=None):
+    """Redo the change undone last; returns its label, or None if there is none
+
+    With seq, from change_history(), raises ConflictError unless that change is still the one to redo.
+    """
+    return store.redo(seq)
+
+def change_history(store):
+    """Return (seq, label) of the next change to undo and to redo; either may be None"""
+    return store.history()
+
+def get_statistics(store):
+    """Calculate task statistics"""
+    return store.statistics()
+
+def filter_tasks(store, statuses=None, priorities=None, sort_option=None, offset=0, limit=None, search=None):
+    """Return the tasks matching the filters and search query in "Sort by" order"""
+    return store.query(statuses, priorities, sort_option, offset=offset, limit=limit, search=search)
+
+def count_tasks(store, statuses=None, priorities=None, search=None):
+    """Count the tasks matching the filters and search query"""
+    return store.count(statuses, priorities, search)
+
+def export_to_file(store, export_format, path, statuses=None, priorities=None, sort_option=None, search=None):
+    """Write the filtered, sorted tasks to path in the given export format"""
+    WRITERS[export_format](task_rows(store, statuses, priorities, sort_option, search)[1], path)
+
+def import_file(store, file, file_name):
+    """Bulk import a CSV or JSON file; returns (new ids, rejected rows)"""
+    from task_import import import_tasks  # pandas is only needed here
+    return import_tasks(store, file, file_name)
+
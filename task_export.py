@@ -0,0 +1,136 @@
+"""Export tasks from a TaskStore as CSV, Parquet or Arrow IPC files.
+
+The matching rows are copied out of the store as tuples under its read lock,
+so a task changed during a background export cannot change the file, then
+written to disk in chunks. Files are named after the store's data
+version and the filter and sort used, so a repeat download reuses the file
+until the tasks change. Every writer takes an optional progress(rows done,
+total rows) callback, called as each chunk is written, for background export
+jobs (export_jobs.py). Parquet and Arrow IPC need pyarrow.
+"""
+import csv
+import hashlib
+import os
+import tempfile
+
+from task_store import format_created_at
+
+CHUNK_SIZE = 10_000
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+FIELDS = ["id", "name", "priority", "status", "created_at"]
+
+
+def available_formats():
+    """Return the export formats the installed libraries can write"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ["CSV"]
+    return list(EXPORT_FORMATS)
+
+
+def task_rows(store, statuses=None, priorities=None, sort_option=None, search=None):
+    """Return (data version, Task.as_row() tuples) of the filtered, sorted tasks, read as one snapshot"""
+    with store.lock.read():
+        return store.version, [task.as_row() for task in store.query(statuses, priorities, sort_option, search=search)]
+
+
+def iter_chunks(rows, chunk_size=CHUNK_SIZE, progress=None):
+    """Yield successive slices of at most chunk_size rows, reporting each one done to progress"""
+    if progress:
+        progress(0, len(rows))
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+        if progress:
+            progress(min(start + chunk_size, len(rows)), len(rows))
+
+
+def write_csv(rows, path, progress=None):
+    """Write Task.as_row() tuples to a CSV file, one chunk at a time"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for chunk in iter_chunks(rows, progress=progress):
+            writer.writerows((*row[:4], format_created_at(row[4])) for row in chunk)
+
+
+def _arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("priority", pa.int8()),
+        ("status", pa.string()),
+        ("created_at", pa.timestamp("s", tz="UTC")),
+    ])
+
+
+def _record_batches(rows, schema, progress=None):
+    """Yield one Arrow record batch per chunk of rows; the schema's fields lead each row"""
+    import pyarrow as pa
+    for chunk in iter_chunks(rows, progress=progress):
+        yield pa.record_batch(
+            [pa.array([row[index] for row in chunk], type=field.type) for index, field in enumerate(schema)],
+            schema=schema,
+        )
+
+
+def write_parquet(rows, path, progress=None):
+    """Write Task.as_row() tuples to a Parquet file, one row group per chunk"""
+    import pyarrow.parquet as pq
+    schema = _arrow_schema()
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in _record_batches(rows, schema, progress):
+            writer.write_batch(batch)
+
+
+def write_arrow(rows, path, progress=None):
+    """Write Task.as_row() tuples to an Arrow IPC file, one record batch per chunk"""
+    import pyarrow as pa
+    schema = _arrow_schema()
+    with pa.ipc.new_file(path, schema) as writer:
+        for batch in _record_batches(rows, schema, progress):
+            writer.write_batch(batch)
+
+
+WRITERS = {
+    "CSV": write_csv,
+    "Parquet": write_parquet,
+    "Arrow IPC": write_arrow,
+}
+
+
+def export_tasks(
+    store, export_format, directory, statuses=None, priorities=None, sort_option=None, search=None, progress=None
+):
+    """Write the filtered, sorted (and searched) tasks to a file in directory and return its path
+
+    The file is reused while it exists and the store's data version is
+    unchanged; ExportJobs deletes it once no job holds it.
+    """
+    extension, _ = EXPORT_FORMATS[export_format]
+    version, rows = task_rows(store, statuses, priorities, sort_option, search)
+    key = repr((export_format, statuses, priorities, sort_option, search)).encode()
+    path = os.path.join(directory, f"tasks_v{version}_{hashlib.sha1(key).hexdigest()[:12]}.{extension}")
+    if os.path.exists(path):
+        if progress:
+            progress(len(rows), len(rows))
+        return path
+
+    # Write under a unique name so concurrent exports never share a file
+    fd, partial = tempfile.mkstemp(suffix=".part", dir=directory)
+    os.close(fd)
+    try:
+        WRITERS[export_format](rows, partial, progress)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
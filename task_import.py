@@ -0,0 +1,103 @@
+"""Bulk import of tasks from CSV or JSON files.
+
+Files use the columns of the CSV export: name, priority, status and an
+optional created_at (an id column is ignored; imported tasks get new ids).
+Each column is validated in one vectorized pass, rejected rows are reported
+with their reasons, and the valid rows are added in a single transaction.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil import tz
+
+from task_store import PRIORITIES, STATUSES
+
+REQUIRED_COLUMNS = ["name", "priority", "status"]
+
+# created_at must fall between 1970 and the last day format_created_at can
+# show; a millisecond epoch, say, lands tens of thousands of years later
+CREATED_AT_RANGE = (0, 253402214400)  # up to 9999-12-31 00:00:00 UTC
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def read_tasks_file(file, file_name):
+    """Read a CSV or JSON (list of records) file into a DataFrame"""
+    if file_name.lower().endswith(".json"):
+        return pd.read_json(file, orient="records", dtype=False)
+    return pd.read_csv(file, dtype={"name": str, "status": str}, keep_default_na=False)
+
+
+def _created_at_column(df):
+    """Return created_at as epoch seconds, NaN where it cannot be parsed
+
+    Missing or blank values default to now. Numbers, and numeric text, are
+    epoch seconds; other text uses the export's "%Y-%m-%d %H:%M:%S"
+    local-time format. A JSON column may mix the two.
+    """
+    now = time.time()
+    if "created_at" not in df.columns:
+        return pd.Series(now, index=df.index, dtype="float64")
+    column = df["created_at"]
+    numbers = pd.to_numeric(column, errors="coerce").astype("float64")
+    text = column.where(numbers.isna()).fillna("").astype(str).str.strip()
+    parsed = pd.to_datetime(text.where(text != ""), format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    # The local UTC offset (and DST) of each date, like format_created_at; the
+    # zone file localizes the whole column at once, where tzlocal() goes row by
+    # row. The repeated hour when clocks go back is read as standard time.
+    local = parsed.dt.tz_localize(tz.gettz() or tz.tzlocal(), ambiguous=False, nonexistent="shift_forward")
+    epoch = numbers.fillna((local - EPOCH) // pd.Timedelta(seconds=1))
+    return epoch.where(numbers.notna() | (text != ""), now)
+
+
+def validate_tasks(df):
+    """Split a DataFrame of tasks into valid rows and rejected rows
+
+    Returns (rows, rejected): rows is a list of (name, priority, status,
+    created_at) tuples for TaskStore.add_many, rejected holds the offending
+    rows, numbered from 1, with a "reason" column.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    names = df["name"].fillna("").astype(str)
+    priorities = pd.to_numeric(df["priority"], errors="coerce")
+    statuses = df["status"].fillna("").astype(str).str.strip()
+    created_at = _created_at_column(df)
+
+    # Column-wise validate_priority / validate_status, plus the add_task name rule
+    checks = {
+        "empty name": (names.str.strip() == "").to_numpy(),
+        "priority must be 1-5": (~priorities.isin(PRIORITIES)).to_numpy(),
+        "status must be Pending or Completed": (~statuses.isin(STATUSES)).to_numpy(),
+        "invalid created_at": (~created_at.between(*CREATED_AT_RANGE)).to_numpy(),
+    }
+    bad = np.logical_or.reduce(list(checks.values()))
+    reasons = np.full(len(df), "", dtype=object)
+    for reason, failed in checks.items():
+        reasons[failed] += reason + "; "
+
+    rejected = df[bad].copy()
+    rejected.insert(0, "row", np.flatnonzero(bad) + 1)
+    rejected["reason"] = [reason[:-2] for reason in reasons[bad]]
+
+    valid = ~bad
+    rows = list(zip(
+        names[valid].tolist(),
+        priorities[valid].astype("int64").tolist(),
+        statuses[valid].tolist(),
+        created_at[valid].astype("int64").tolist(),
+    ))
+    return rows, rejected
+
+
+def import_tasks(store, file, file_name):
+    """Validate a CSV or JSON file and add its valid rows to the store
+
+    Returns (new ids, rejected rows). Raises ValueError if the file cannot
+    be parsed or lacks a required column.
+    """
+    rows, rejected = validate_tasks(read_tasks_file(file, file_name))
+    ids = store.add_many(rows) if rows else []
+    return ids, rejected
@@ -1,6 +1,15 @@
+import tempfile
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+from export_jobs import ExportJobs, render_export_job
+from rerun_timing import render_timing_panel, start_rerun_timer
+from task_core import (
+    EXPORT_FORMATS, PRIORITY_LABEL, RELEVANCE, SORT_OPTIONS, ConflictError, add_task,
+    available_formats, board_version, change_history, clear_tasks, count_tasks, delete_task,
+    delete_tasks, export_tasks, filter_tasks, format_created_at, get_statistics, import_file,
+    open_store, redo_change, set_tasks_status, undo_change, update_task_status,
+    validate_priority, validate_status
+)
 
 # Page configuration
 st.set_page_config(
@@ -10,6 +19,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-section rerun timings (?debug=1 or RERUN_TIMING=1)
+timer = start_rerun_timer("task_manager")
+
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -53,10 +65,31 @@ st.markdown("""
     }
     </style>
 """, unsafe_allow_html=True)
+timer.split("CSS injection")
+
+# Shared task store: one SQLite connection per process
+@st.cache_resource
+def get_task_store():
+    return open_store()
+
+store = get_task_store()
+
+# Pick up writes made by other processes, such as the command line; sessions
+# in this process share the store and see each other's changes directly
+board_version(store)
 
-# Initialize session state for tasks
-if 'tasks' not in st.session_state:
-    st.session_state.tasks = []
+# How often each session checks whether someone else changed the board
+BOARD_POLL_SECONDS = 3
+
+# Export files are written here and reused until the tasks change
+@st.cache_resource
+def get_export_dir():
+    return tempfile.mkdtemp(prefix="task_manager_exports_")
+
+# Exports run in the background; sessions asking for the same export share its job
+@st.cache_resource
+def get_export_jobs():
+    return ExportJobs()
 
 # Priority mapping with emojis
 PRIORITY_EMOJI = {
@@ -67,59 +100,83 @@ PRIORITY_EMOJI = {
     5: "🔵"
 }
 
-PRIORITY_LABEL = {
-    1: "Critical",
-    2: "High",
-    3: "Medium",
-    4: "Low",
-    5: "Very Low"
-}
-
 STATUS_EMOJI = {
     "Pending": "⏳",
     "Completed": "✅"
 }
 
-# Functions
-def validate_priority(priority):
-    """Validate priority is between 1 and 5"""
-    return 1 <= priority <= 5
-
-def validate_status(status):
-    """Validate status is either Pending or Completed"""
-    return status in ["Pending", "Completed"]
-
-def add_task(name, priority, status):
-    """Add a new task to the session state"""
-    if name.strip():  # Check if task name is not empty
-        task = {
-            "id": len(st.session_state.tasks) + 1,
-            "name": name,
-            "priority": priority,
-            "status": status,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        st.session_state.tasks.append(task)
-        return True
-    return False
-
-def delete_task(task_id):
-    """Delete a task by ID"""
-    st.session_state.tasks = [task for task in st.session_state.tasks if task["id"] != task_id]
-
-def update_task_status(task_id):
-    """Toggle task status between Pending and Completed"""
-    for task in st.session_state.tasks:
-        if task["id"] == task_id:
-            task["status"] = "Completed" if task["status"] == "Pending" else "Pending"
-            break
-
-def get_statistics():
-    """Calculate task statistics"""
-    total = len(st.session_state.tasks)
-    completed = sum(1 for task in st.session_state.tasks if task["status"] == "Completed")
-    pending = total - completed
-    return total, completed, pending
+# Task actions run as button callbacks with the version of the task the user
+# saw, so a change someone else made in the meantime is reported, not overwritten
+def task_action(action, task_id, version):
+    try:
+        action(store, task_id, version)
+    except ConflictError as e:
+        st.session_state.task_conflict = f"{e}; the board has been refreshed."
+
+# Bulk actions change every selected task in one store mutation, then clear
+# the selection by moving the selection widgets to fresh keys
+def bulk_action(action, *args):
+    skipped = action(store, *args)
+    if skipped:
+        st.session_state.task_conflict = (
+            f"{len(skipped)} selected tasks were changed by someone else and were left alone."
+        )
+    for key in [key for key in st.session_state if key.startswith("select_")]:
+        del st.session_state[key]
+    st.session_state.selection_round = st.session_state.get("selection_round", 0) + 1
+
+def bulk_action_bar(selected):
+    """Buttons that complete, reopen or delete all selected tasks at once"""
+    versions = {task.id: task.version for task in selected}
+    st.caption(f"☑️ {len(selected)} tasks selected")
+    bulk_col1, bulk_col2, bulk_col3 = st.columns(3)
+    with bulk_col1:
+        st.button(
+            "✅ Complete Selected",
+            key="bulk_complete",
+            on_click=bulk_action,
+            args=(set_tasks_status, list(versions), "Completed", versions)
+        )
+    with bulk_col2:
+        st.button(
+            "↩️ Reopen Selected",
+            key="bulk_reopen",
+            on_click=bulk_action,
+            args=(set_tasks_status, list(versions), "Pending", versions)
+        )
+    with bulk_col3:
+        st.button(
+            "🗑️ Delete Selected",
+            key="bulk_delete",
+            type="secondary",
+            on_click=bulk_action,
+            args=(delete_tasks, list(versions), versions)
+        )
+
+# Undo and redo walk the store's journal of changes, shared by every session;
+# seq is the change the button showed, which may no longer be the one on top
+def replay_change(action, seq):
+    try:
+        action(store, seq)
+    except ConflictError as e:
+        st.session_state.task_conflict = str(e)
+
+# Starting a search ranks the results by relevance; refining it keeps the
+# chosen order
+def start_search():
+    searching = bool(st.session_state.task_search.strip())
+    if searching and not st.session_state.get("searching"):
+        st.session_state.sort_option = RELEVANCE
+    st.session_state.searching = searching
+
+# Rerun when another session or process changes the board; each tick only
+# compares version stamps
+@st.fragment(run_every=BOARD_POLL_SECONDS)
+def watch_board():
+    if board_version(store) != st.session_state.get("seen_version"):
+        st.rerun()
+
+timer.split("store")
 
 # Header
 st.markdown("# 📋 Task Manager Pro")
@@ -150,7 +207,7 @@ with st.sidebar:
         
         if submit_button:
             if validate_priority(task_priority) and validate_status(task_status):
-                if add_task(task_name, task_priority, task_status):
+                if add_task(store, task_name, task_priority, task_status):
                     st.success("✅ Task added successfully!")
                     st.balloons()
                 else:
@@ -160,154 +217,312 @@ with st.sidebar:
     
     st.markdown("---")
     
-    # Filter options
+    # Bulk import from a CSV or JSON file
+    st.markdown("## 📤 Import Tasks")
+    uploaded_file = st.file_uploader("CSV or JSON file", type=["csv", "json"])
+    if uploaded_file is not None and st.button("📤 Import Tasks"):
+        try:
+            imported, rejected = import_file(store, uploaded_file, uploaded_file.name)
+        except ValueError as e:
+            st.error(f"❌ Could not import {uploaded_file.name}: {e}")
+        else:
+            st.success(f"✅ Imported {len(imported)} tasks!")
+            if len(rejected):
+                st.warning(f"⚠️ {len(rejected)} rows were rejected:")
+                st.dataframe(rejected, hide_index=True)
+    
+    st.markdown("---")
+    
+    # Filter options; keyed, so the live counts in the labels do not make a new widget
+    # (and reset the filter) every time the board changes
     st.markdown("## 🔍 Filter Tasks")
     filter_status = st.multiselect(
         "Status",
         options=["Pending", "Completed"],
-        default=["Pending", "Completed"]
+        default=["Pending", "Completed"],
+        key="filter_status",
+        format_func=lambda x: f"{STATUS_EMOJI[x]} {x} ({store.status_counts[x]})"
     )
     
     filter_priority = st.multiselect(
         "Priority",
         options=[1, 2, 3, 4, 5],
         default=[1, 2, 3, 4, 5],
-        format_func=lambda x: f"{PRIORITY_EMOJI[x]} {PRIORITY_LABEL[x]}"
+        key="filter_priority",
+        format_func=lambda x: f"{PRIORITY_EMOJI[x]} {PRIORITY_LABEL[x]} ({store.priority_counts[x]})"
     )
     
     st.markdown("---")
     
     # Clear all tasks button
     if st.button("🗑️ Clear All Tasks", type="secondary"):
-        if st.session_state.tasks:
-            st.session_state.tasks = []
+        if len(store):
+            clear_tasks(store)
             st.success("All tasks cleared!")
             st.rerun()
 
-# Main content area
-col1, col2, col3 = st.columns(3)
-
-total_tasks, completed_tasks, pending_tasks = get_statistics()
-
-with col1:
-    st.markdown(f"""
-        <div class="metric-card">
-            <h2>📊 {total_tasks}</h2>
-            <p>Total Tasks</p>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);">
-            <h2>✅ {completed_tasks}</h2>
-            <p>Completed</p>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #ee0979 0%, #ff6a00 100%);">
-            <h2>⏳ {pending_tasks}</h2>
-            <p>Pending</p>
-        </div>
-    """, unsafe_allow_html=True)
+timer.split("sidebar")
 
-st.markdown("---")
+# Metric cards and the task list form one fragment, so a card action reruns
+# only this part of the page, not the sidebar, the export section or the CSS.
+# Fragment reruns are timed on their own, as "task_manager_board".
+@st.fragment
+def task_board():
+    board_timer = start_rerun_timer("task_manager_board")
+
+    # Everything below shows the board as of this version
+    st.session_state.seen_version = store.version
+
+    if "task_conflict" in st.session_state:
+        st.warning(f"⚠️ {st.session_state.pop('task_conflict')}")
+
+    undo_entry, redo_entry = change_history(store)
+    undo_col, redo_col = st.columns(2)
+
+    with undo_col:
+        st.button(
+            f"↩️ Undo: {undo_entry[1]}" if undo_entry else "↩️ Undo",
+            key="undo_change",
+            disabled=undo_entry is None,
+            on_click=replay_change,
+            args=(undo_change, undo_entry and undo_entry[0])
+        )
+
+    with redo_col:
+        st.button(
+            f"↪️ Redo: {redo_entry[1]}" if redo_entry else "↪️ Redo",
+            key="redo_change",
+            disabled=redo_entry is None,
+            on_click=replay_change,
+            args=(redo_change, redo_entry and redo_entry[0])
+        )
+
+    # Main content area
+    col1, col2, col3 = st.columns(3)
+
+    total_tasks, completed_tasks, pending_tasks = get_statistics(store)
+
+    with col1:
+        st.markdown(f"""
+            <div class="metric-card">
+                <h2>📊 {total_tasks}</h2>
+                <p>Total Tasks</p>
+            </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        st.markdown(f"""
+            <div class="metric-card" style="background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);">
+                <h2>✅ {completed_tasks}</h2>
+                <p>Completed</p>
+            </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(f"""
+            <div class="metric-card" style="background: linear-gradient(135deg, #ee0979 0%, #ff6a00 100%);">
+                <h2>⏳ {pending_tasks}</h2>
+                <p>Pending</p>
+            </div>
+        """, unsafe_allow_html=True)
 
-# Display tasks
-if st.session_state.tasks:
-    st.markdown("## 📝 Your Tasks")
-    
-    # Filter tasks
-    filtered_tasks = [
-        task for task in st.session_state.tasks
-        if task["status"] in filter_status and task["priority"] in filter_priority
-    ]
-    
-    # Sort options
-    sort_option = st.selectbox(
-        "Sort by:",
-        options=["Priority (High to Low)", "Priority (Low to High)", "Status", "Date Created"],
-        index=0
-    )
-    
-    if sort_option == "Priority (High to Low)":
-        filtered_tasks.sort(key=lambda x: x["priority"])
-    elif sort_option == "Priority (Low to High)":
-        filtered_tasks.sort(key=lambda x: x["priority"], reverse=True)
-    elif sort_option == "Status":
-        filtered_tasks.sort(key=lambda x: x["status"], reverse=True)
-    elif sort_option == "Date Created":
-        filtered_tasks.sort(key=lambda x: x["created_at"], reverse=True)
-    
-    if filtered_tasks:
-        for task in filtered_tasks:
-            status_class = "completed" if task["status"] == "Completed" else "pending"
-            priority_class = f"priority-{task['priority']}"
-            
-            with st.container():
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                
-                with col1:
-                    st.markdown(f"""
-                        <div class="task-card {status_class} {priority_class}">
-                            <h3>{STATUS_EMOJI[task['status']]} {task['name']}</h3>
-                            <p><strong>{PRIORITY_EMOJI[task['priority']]} Priority:</strong> {PRIORITY_LABEL[task['priority']]}</p>
-                            <p><strong>📅 Created:</strong> {task['created_at']}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.write("")
-                    st.write("")
-                    if task["status"] == "Pending":
-                        if st.button(f"✅ Complete", key=f"complete_{task['id']}"):
-                            update_task_status(task['id'])
-                            st.rerun()
-                    else:
-                        if st.button(f"↩️ Reopen", key=f"reopen_{task['id']}"):
-                            update_task_status(task['id'])
-                            st.rerun()
-                
-                with col3:
-                    st.write("")
-                    st.write("")
-                    if st.button(f"🗑️ Delete", key=f"delete_{task['id']}", type="secondary"):
-                        delete_task(task['id'])
-                        st.rerun()
-    else:
-        st.info("🔍 No tasks match the current filters.")
-    
     st.markdown("---")
-    
-    # Export tasks as CSV
+    board_timer.split("statistics")
+
+    # Display tasks
+    if total_tasks:
+        st.markdown("## 📝 Your Tasks")
+
+        # Search task names through the store's index; matches can be ranked by relevance
+        search_col, sort_col = st.columns([2, 1])
+
+        with search_col:
+            search_query = st.text_input(
+                "🔎 Search:",
+                placeholder="Words or parts of words...",
+                key="task_search",
+                on_change=start_search
+            ).strip() or None
+
+        # Sort options
+        with sort_col:
+            sort_option = st.selectbox(
+                "Sort by:",
+                options=[RELEVANCE, *SORT_OPTIONS] if search_query else SORT_OPTIONS,
+                index=0,
+                key="sort_option"
+            )
+
+        # Page through the matching tasks so each rerun builds at most one page
+        view_col, size_col, page_col = st.columns([2, 1, 1])
+
+        with view_col:
+            view_mode = st.radio("View:", options=["Cards", "Table"], horizontal=True)
+
+        with size_col:
+            page_size = st.selectbox("Tasks per page:", options=[10, 25, 50, 100], index=1)
+
+        matching_tasks = count_tasks(store, filter_status, filter_priority, search_query)
+        page_count = max(1, -(-matching_tasks // page_size))
+        if st.session_state.get("task_page", 1) > page_count:
+            st.session_state.task_page = page_count
+
+        with page_col:
+            page = st.number_input("Page:", min_value=1, max_value=page_count, step=1, key="task_page")
+
+        # Filter, sort and slice tasks with the store's indexes
+        offset = (page - 1) * page_size
+        page_tasks = filter_tasks(
+            store, filter_status, filter_priority, sort_option, offset=offset, limit=page_size, search=search_query
+        )
+        board_timer.split("filter + sort")
+
+        if page_tasks:
+            st.caption(f"Showing {offset + 1}–{offset + len(page_tasks)} of {matching_tasks} tasks")
+
+            selection_round = st.session_state.get("selection_round", 0)
+
+            if view_mode == "Table":
+                table = [
+                    {
+                        "ID": task.id,
+                        "Task": task.name,
+                        "Priority": f"{PRIORITY_EMOJI[task.priority]} {PRIORITY_LABEL[task.priority]}",
+                        "Status": f"{STATUS_EMOJI[task.status]} {task.status}",
+                        "Created": format_created_at(task.created_at)
+                    }
+                    for task in page_tasks
+                ]
+                # The selection is a list of row positions, so it must not outlive the rows:
+                # everything that decides them is part of the key
+                table_key = (
+                    selection_round, store.version, page, page_size, tuple(filter_status),
+                    tuple(filter_priority), sort_option, search_query
+                )
+                selection = st.dataframe(
+                    table,
+                    hide_index=True,
+                    width="stretch",
+                    on_select="rerun",
+                    selection_mode="multi-row",
+                    key=f"task_table_{table_key}"
+                )
+
+                selected = [page_tasks[row] for row in selection.selection.rows if row < len(page_tasks)]
+                if selected:
+                    bulk_action_bar(selected)
+            else:
+                # Checkbox values are already in session state from the click
+                selected = [task for task in page_tasks if st.session_state.get(f"select_{selection_round}_{task.id}")]
+                if selected:
+                    bulk_action_bar(selected)
+
+                for task in page_tasks:
+                    status_class = "completed" if task.status == "Completed" else "pending"
+                    priority_class = f"priority-{task.priority}"
+
+                    with st.container():
+                        col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+
+                        with col1:
+                            st.markdown(f"""
+                                <div class="task-card {status_class} {priority_class}">
+                                    <h3>{STATUS_EMOJI[task.status]} {task.name}</h3>
+                                    <p><strong>{PRIORITY_EMOJI[task.priority]} Priority:</strong> {PRIORITY_LABEL[task.priority]}</p>
+                                    <p><strong>📅 Created:</strong> {format_created_at(task.created_at)}</p>
+                                </div>
+                            """, unsafe_allow_html=True)
+
+                        with col2:
+                            st.write("")
+                            st.write("")
+                            if task.status == "Pending":
+                                st.button(
+                                    f"✅ Complete",
+                                    key=f"complete_{task.id}",
+                                    on_click=task_action,
+                                    args=(update_task_status, task.id, task.version)
+                                )
+                            else:
+                                st.button(
+                                    f"↩️ Reopen",
+                                    key=f"reopen_{task.id}",
+                                    on_click=task_action,
+                                    args=(update_task_status, task.id, task.version)
+                                )
+
+                        with col3:
+                            st.write("")
+                            st.write("")
+                            st.button(
+                                f"🗑️ Delete",
+                                key=f"delete_{task.id}",
+                                type="secondary",
+                                on_click=task_action,
+                                args=(delete_task, task.id, task.version)
+                            )
+
+                        with col4:
+                            st.write("")
+                            st.write("")
+                            st.checkbox("Select", key=f"select_{selection_round}_{task.id}")
+        else:
+            st.info("🔍 No tasks match the current filters.")
+
+        st.markdown("---")
+        board_timer.split("task cards")
+    else:
+        st.info("👋 No tasks yet! Add your first task using the sidebar.")
+        st.markdown("""
+            ### 💡 Getting Started:
+            1. Use the sidebar to add a new task
+            2. Set the priority level (1-5)
+            3. Choose the status (Pending/Completed)
+            4. Click 'Add Task' to save
+
+            ### ✨ Features:
+            - ✅ Add, edit, and delete tasks
+            - 🎯 Set priority levels with visual indicators
+            - 📊 Track task statistics
+            - 🔍 Search, filter and sort tasks
+            - 💾 Export tasks to CSV, Parquet or Arrow
+        """)
+
+    board_timer.finish()
+
+task_board()
+timer.split("task board")
+
+if len(store):
+    # Export the filtered, sorted tasks
     st.markdown("## 📥 Export Tasks")
-    if st.button("💾 Download Tasks as CSV"):
-        df = pd.DataFrame(st.session_state.tasks)
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📄 Download CSV",
-            data=csv,
-            file_name=f"tasks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
+    export_format = st.selectbox("Format:", options=available_formats())
+    st.caption("Exports follow the current filters, search and sort order.")
+    # The search and sort order are picked inside the task board fragment
+    search_query = st.session_state.get("task_search", "").strip() or None
+    sort_option = st.session_state.get("sort_option", SORT_OPTIONS[0])
+    export_key = (
+        store.version, export_format, tuple(filter_status), tuple(filter_priority), sort_option, search_query
+    )
+    if st.button(f"💾 Export Tasks as {export_format}"):
+        export_jobs = get_export_jobs()
+        # Jobs for older versions of the board are of no use to anyone now
+        export_jobs.discard(lambda key: key[0] == store.version)
+        st.session_state.task_export_job = export_jobs.submit(
+            export_key, export_tasks,
+            store, export_format, get_export_dir(), filter_status, filter_priority, sort_option, search_query
         )
-else:
-    st.info("👋 No tasks yet! Add your first task using the sidebar.")
-    st.markdown("""
-        ### 💡 Getting Started:
-        1. Use the sidebar to add a new task
-        2. Set the priority level (1-5)
-        3. Choose the status (Pending/Completed)
-        4. Click 'Add Task' to save
-        
-        ### ✨ Features:
-        - ✅ Add, edit, and delete tasks
-        - 🎯 Set priority levels with visual indicators
-        - 📊 Track task statistics
-        - 🔍 Filter and sort tasks
-        - 💾 Export tasks to CSV
-    """)
+    # Only offer the job that matches what is on screen now
+    export_job = st.session_state.get("task_export_job")
+    if export_job is not None and export_job.key == export_key:
+        extension, mime = EXPORT_FORMATS[export_format]
+        render_export_job(
+            export_job,
+            f"📄 Download {export_format}",
+            f"tasks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+            mime
+        )
+    timer.split("export")
 
 # Footer
 st.markdown("---")
@@ -316,3 +531,9 @@ st.markdown("""
         <p>Made with ❤️ using Streamlit | Task Manager Pro v1.0</p>
     </div>
 """, unsafe_allow_html=True)
+timer.split("footer")
+
+watch_board()
+
+timer.finish()
+render_timing_panel(timer)
@@ -0,0 +1,202 @@
+"""Inverted index over task names for the search box.
+
+The Personal Organizer uses the same index for event names and notes, with
+event ids in place of task ids.
+
+Each name is split into lowercase word tokens. The index maps every token,
+and every trigram of every token, to the sorted ids of the tasks containing
+it. A query term of three or more characters matches names that contain it
+anywhere: the id lists of its trigrams are intersected, smallest first, and
+the few candidates left are checked against the name. Shorter terms match
+token prefixes through a sorted vocabulary. Every term of a query must match.
+
+Matches are ranked per term: equal to a whole token scores 3, a token prefix
+2, any other substring 1; a task's relevance is the sum over the terms.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+TOKEN_RE = re.compile(r"\w+")
+
+EXACT, PREFIX, SUBSTRING = 3, 2, 1
+
+# Search results remembered per store, most recently used first; typing a
+# query makes a new one per keystroke, so only a few are worth keeping
+MEMO_SIZE = 8
+
+# Candidates fewer than 1/BISECT_FRACTION of an id list are looked up in it
+# by bisect; more are checked against a set of the list, built in one pass
+BISECT_FRACTION = 16
+
+
+def tokenize(text):
+    """Return the lowercase word tokens of text"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(token):
+    """Return the set of three-character substrings of a token"""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _insert(ids, task_id):
+    """Add task_id to a sorted id list; new ids are usually the largest"""
+    if not ids or ids[-1] < task_id:
+        ids.append(task_id)
+    else:
+        insort(ids, task_id)
+
+
+def _remove(postings, key, task_id):
+    """Remove task_id from postings[key], dropping the key once it is empty"""
+    ids = postings[key]
+    del ids[bisect_left(ids, task_id)]
+    if not ids:
+        del postings[key]
+        return True
+    return False
+
+
+def _contains(ids, task_id):
+    index = bisect_left(ids, task_id)
+    return index < len(ids) and ids[index] == task_id
+
+
+class SearchIndex:
+    """Tokens and trigrams of task names, each mapped to sorted task ids"""
+
+    def __init__(self):
+        self.tokens = {}
+        self.trigrams = {}
+        self.vocabulary = []  # sorted tokens, for prefix queries
+
+    def add(self, task_id, name):
+        """Index one task name"""
+        grams = set()
+        for token in set(tokenize(name)):
+            ids = self.tokens.get(token)
+            if ids is None:
+                self.tokens[token] = [task_id]
+                insort(self.vocabulary, token)
+            else:
+                _insert(ids, task_id)
+            grams |= trigrams(token)
+        for gram in grams:
+            _insert(self.trigrams.setdefault(gram, []), task_id)
+
+    def add_many(self, tasks):
+        """Index (id, name) pairs in increasing id order, all newer than any indexed yet
+
+        With ids arriving in order every id list is only appended to, and the
+        vocabulary is sorted once at the end.
+        """
+        tokens, index = self.tokens, self.trigrams
+        for task_id, name in tasks:
+            grams = set()
+            for token in set(TOKEN_RE.findall(name.lower())):
+                ids = tokens.get(token)
+                if ids is None:
+                    tokens[token] = [task_id]
+                else:
+                    ids.append(task_id)
+                grams.update([token[i:i + 3] for i in range(len(token) - 2)])
+            for gram in grams:
+                ids = index.get(gram)
+                if ids is None:
+                    index[gram] = [task_id]
+                else:
+                    ids.append(task_id)
+        self.vocabulary = sorted(tokens)
+
+    def remove(self, task_id, name):
+        """Drop a task name from the index"""
+        grams = set()
+        for token in set(tokenize(name)):
+            if _remove(self.tokens, token, task_id):
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+            grams |= trigrams(token)
+        for gram in grams:
+            _remove(self.trigrams, gram, task_id)
+
+    def search(self, query, name_of):
+        """Return {task id: relevance} for the tasks matching every term of query
+
+        name_of(task_id) returns a task's name, to check substring candidates.
+        Returns None when the query has no terms.
+        """
+        scores = None
+        for term in tokenize(query):
+            matches = self._match(term, name_of)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {task_id: score + matches[task_id] for task_id, score in scores.items() if task_id in matches}
+            if not scores:
+                break
+        return scores
+
+    def _match(self, term, name_of):
+        """Return {task id: score} for one term"""
+        scores = {}
+        # Token prefixes, then whole tokens, which outrank them
+        vocabulary = self.vocabulary
+        start = index = bisect_left(vocabulary, term)
+        while index < len(vocabulary) and vocabulary[index].startswith(term):
+            if vocabulary[index] != term:
+                scores.update(dict.fromkeys(self.tokens[vocabulary[index]], PREFIX))
+            index += 1
+        if start < len(vocabulary) and vocabulary[start] == term:
+            scores.update(dict.fromkeys(self.tokens[term], EXACT))
+        if len(term) < 3:
+            return scores
+
+        # Substrings inside tokens, from the trigram lists
+        grams = trigrams(term)
+        if any(gram not in self.trigrams for gram in grams):
+            return scores
+        postings = sorted((self.trigrams[gram] for gram in grams), key=len)
+        candidates = [task_id for task_id in postings[0] if task_id not in scores]
+        for ids in postings[1:]:
+            if len(candidates) * BISECT_FRACTION < len(ids):
+                candidates = [task_id for task_id in candidates if _contains(ids, task_id)]
+            else:
+                members = set(ids)
+                candidates = [task_id for task_id in candidates if task_id in members]
+        # A three-letter term is its own trigram, so there is nothing to check
+        check = len(term) > 3
+        for task_id in candidates:
+            if not check or term in name_of(task_id).lower():
+                scores[task_id] = SUBSTRING
+        return scores
+
+
+class SearchMemo:
+    """The last MEMO_SIZE search results of a store, forgotten when its data version changes
+
+    Safe to share between threads reading the store at once.
+    """
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self.version = None
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, version, key, compute):
+        """Return the result for key at this data version, from compute() unless it is remembered"""
+        with self.lock:
+            if self.version != version:
+                self.results.clear()
+                self.version = version
+            elif key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+        result = compute()
+        with self.lock:
+            if self.version == version:
+                self.results[key] = result
+                if len(self.results) > self.size:
+                    self.results.popitem(last=False)
+        return result
@@ -0,0 +1,783 @@
+"""SQLite storage engine for Task Manager Pro.
+
+One TaskStore (one connection) is shared by every session in the process;
+the database runs in WAL mode so readers never wait on the writer. Tasks are
+also kept in memory, keyed by id in insertion order, so lookups, toggles and
+deletes never scan; every mutation is written through to SQLite and updates
+the per-status and per-priority counters, so statistics never scan either.
+Every mutation also bumps the store's data version, which caches key on.
+In memory each task is a compact Task object rather than a dict.
+Tasks are also grouped into one bucket per (status, priority) pair, each kept
+sorted by id and by created_at with bisect: a filter only touches the buckets
+it selects, and every "Sort by" order is a merge of already sorted buckets.
+Names are indexed for search by task_search.SearchIndex as tasks come and go,
+and the latest few search results are kept (task_search.SearchMemo) until
+the data changes.
+
+Every change is also recorded, in the same transaction, in task_journal, an
+undo journal holding what it takes to undo each change; undo() and redo()
+walk it. Undoing or redoing an entry rewrites it in place (what to restore
+and what to expect swap over), a new change drops the entries that were
+undone, and only the last JOURNAL_LIMIT entries are kept. The cap counts
+changes, not bytes: a clear() or a large add_many() stores every row it
+touched as JSON in one entry, and each undo or redo rewrites that entry.
+The tasks table is always the current snapshot, so startup never replays
+the journal.
+
+Sessions share the store under a readers-writer lock, so queries run side by
+side and only mutations are serialized. Each task carries a version that every
+change bumps; toggle() and delete() can be given the version the caller last
+saw and raise ConflictError instead of silently overwriting someone else's
+change. Writes made by other processes (the command line) are picked up by
+sync(), which compares SQLite's data_version before reloading anything.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from heapq import merge
+from itertools import chain, islice
+from operator import attrgetter
+
+from task_search import SearchIndex, SearchMemo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE TABLE IF NOT EXISTS task_journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT NOT NULL,
+    restore TEXT NOT NULL,
+    expect TEXT NOT NULL,
+    undone INTEGER NOT NULL DEFAULT 0,
+    created_at INTEGER NOT NULL
+);
+"""
+
+# How many changes the journal keeps for undo, however many rows each touched
+JOURNAL_LIMIT = 100
+
+COLUMNS = "id, name, priority, status, created_at, version"
+
+STATUSES = ("Pending", "Completed")
+PRIORITIES = (1, 2, 3, 4, 5)
+
+# Status names by their small-int code, and back
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Each (status, priority) bucket keeps its tasks sorted by these keys;
+# id keeps ties in insertion order
+BUCKET_KEYS = {
+    "id": lambda task: task.id,
+    "created_at": lambda task: (task.created_at, task.id),
+}
+
+
+# Stable sorts that put search results in each "Sort by" order, ties going as
+# in the bucket merges. Without one, results are ranked by relevance.
+SORT_PASSES = {
+    "Priority (High to Low)": ((attrgetter("priority"), False),),
+    "Priority (Low to High)": ((attrgetter("priority"), True),),
+    "Status": ((attrgetter("status_code"), False),),
+    "Date Created": ((attrgetter("created_at", "id"), True),),
+}
+
+# Batches smaller than 1/BATCH_FRACTION of a bucket are applied task by task
+# with bisect; larger ones rebuild the bucket in one pass
+BATCH_FRACTION = 8
+
+
+def _ordered(matches, sort_option):
+    """Sort a search's (relevance by id, tasks) into a "Sort by" order, relevance by default"""
+    scores, tasks = matches
+    # Stable sorts, least significant key first
+    tasks = sorted(tasks, key=attrgetter("id"))
+    for sort_key, reverse in SORT_PASSES.get(sort_option, ((lambda task: scores[task.id], True),)):
+        tasks.sort(key=sort_key, reverse=reverse)
+    return tasks
+
+
+def empty_buckets():
+    """Return one empty bucket per (status, priority) pair"""
+    return {
+        (status, priority): {name: [] for name in BUCKET_KEYS}
+        for status in STATUSES for priority in PRIORITIES
+    }
+
+
+class ConflictError(Exception):
+    """A task was changed or deleted since the caller last saw it"""
+
+    def __init__(self, task_id, message):
+        super().__init__(message)
+        self.task_id = task_id
+
+
+class ReadWriteLock:
+    """Any number of readers or one writer
+
+    The writer may also read and write again while it holds the lock; a reader
+    must not try to write.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._depth = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            while self._writer not in (None, me):
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._writer = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class Task:
+    """One task: small-int status code, epoch created_at, interned name"""
+
+    __slots__ = ("id", "name", "priority", "status_code", "created_at", "version")
+
+    def __init__(self, id, name, priority, status, created_at, version=1):
+        self.id = id
+        self.name = sys.intern(name)
+        self.priority = priority
+        self.status_code = STATUS_CODES[status]
+        self.created_at = created_at
+        self.version = version
+
+    @property
+    def status(self):
+        return STATUSES[self.status_code]
+
+    @status.setter
+    def status(self, status):
+        self.status_code = STATUS_CODES[status]
+
+    def as_row(self):
+        """Return the task as a tuple in COLUMNS order"""
+        return self.id, self.name, self.priority, self.status, self.created_at, self.version
+
+    def as_dict(self):
+        """Return the task as a dict keyed by column name"""
+        return dict(zip(("id", "name", "priority", "status", "created_at", "version"), self.as_row()))
+
+    def __repr__(self):
+        return f"Task{self.as_row()!r}"
+
+
+def format_created_at(timestamp):
+    """Format an epoch timestamp for display"""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TaskStore:
+    """Tasks persisted in a SQLite database"""
+
+    def __init__(self, path):
+        self.path = path
+        # lock guards the in-memory tasks; conn_lock guards the connection
+        self.lock = ReadWriteLock()
+        self.conn_lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.tasks = {}
+        self.next_id = 1
+        self.status_counts = dict.fromkeys(STATUSES, 0)
+        self.priority_counts = dict.fromkeys(PRIORITIES, 0)
+        self.buckets = empty_buckets()
+        self.search_index = SearchIndex()
+        self._search_memo = SearchMemo()
+        self.version = 0
+        self.data_version = None
+        self.load()
+
+    def _migrate(self):
+        """Bring databases written by older versions up to the current schema"""
+        columns = {row["name"]: row["type"] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if columns and "version" not in columns and columns.get("created_at") != "TEXT":
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            self.conn.commit()
+        if columns.get("created_at") != "TEXT":
+            return
+        # created_at used to be stored as a formatted string
+        seq = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+        self.conn.executescript("""
+            DROP INDEX IF EXISTS idx_tasks_status;
+            DROP INDEX IF EXISTS idx_tasks_priority;
+            DROP INDEX IF EXISTS idx_tasks_created_at;
+            ALTER TABLE tasks RENAME TO tasks_old;
+        """ + SCHEMA)
+        with self.conn:
+            rows = self.conn.execute("SELECT id, name, priority, status, created_at FROM tasks_old").fetchall()
+            self.conn.executemany(
+                "INSERT INTO tasks (id, name, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (*row[:4], int(datetime.strptime(row["created_at"], "%Y-%m-%d %H:%M:%S").timestamp()))
+                    for row in rows
+                ],
+            )
+            if seq:
+                self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'tasks'", (seq[0],))
+            self.conn.execute("DROP TABLE tasks_old")
+
+    def _data_version(self):
+        """Return SQLite's data_version, which changes when another connection commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self):
+        """Load every task from the database into memory"""
+        with self.lock.write():
+            with self.conn_lock:
+                rows = self.conn.execute(f"SELECT {COLUMNS} FROM tasks ORDER BY id").fetchall()
+                # AUTOINCREMENT records the highest id ever handed out, even if deleted
+                seq = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+                self.data_version = self._data_version()
+            self.tasks = {row["id"]: Task(*row) for row in rows}
+            self.next_id = max([seq[0] if seq else 0, *self.tasks]) + 1
+            self.status_counts = dict.fromkeys(STATUSES, 0)
+            self.priority_counts = dict.fromkeys(PRIORITIES, 0)
+            self.buckets = empty_buckets()
+            for task in self.tasks.values():
+                self._count(task, 1)
+                bucket = self._bucket(task)
+                for name, key in BUCKET_KEYS.items():
+                    bucket[name].append(key(task))
+            for bucket in self.buckets.values():
+                bucket["created_at"].sort()
+            self.search_index = SearchIndex()
+            self.search_index.add_many((task.id, task.name) for task in self.tasks.values())
+            self.version += 1
+
+    def sync(self):
+        """Reload if another process has written to the database; return the data version
+
+        When nothing else has written this is a single cheap PRAGMA.
+        """
+        with self.conn_lock:
+            changed = self._data_version() != self.data_version
+        if changed:
+            self.load()
+        return self.version
+
+    @contextmanager
+    def _writing(self):
+        """Hold the write lock and one transaction, on up-to-date tasks"""
+        with self.lock.write(), self.conn_lock, self.conn:
+            # Take SQLite's write lock first so no other process can commit
+            # between the data_version check and our own writes
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.sync()
+            yield
+
+    def _count(self, task, delta):
+        """Add delta to the counters a task contributes to"""
+        self.status_counts[task.status] += delta
+        self.priority_counts[task.priority] += delta
+
+    def _bucket(self, task):
+        """Return the (status, priority) bucket a task belongs to"""
+        return self.buckets[(task.status, task.priority)]
+
+    def _index(self, task):
+        """Insert a task into its bucket"""
+        bucket = self._bucket(task)
+        for name, key in BUCKET_KEYS.items():
+            insort(bucket[name], key(task))
+
+    def _unindex(self, task):
+        """Remove a task from its bucket"""
+        bucket = self._bucket(task)
+        for name, key in BUCKET_KEYS.items():
+            index = bucket[name]
+            del index[bisect_left(index, key(task))]
+
+    def _unindex_many(self, tasks):
+        """Remove tasks from their buckets
+
+        A bucket losing a large share of its tasks is rebuilt in one pass
+        instead of deleting from it task by task.
+        """
+        for pair, members in self._group(tasks).items():
+            bucket = self.buckets[pair]
+            if len(members) * BATCH_FRACTION < len(bucket["id"]):
+                for task in members:
+                    self._unindex(task)
+                continue
+            ids = {task.id for task in members}
+            bucket["id"] = [task_id for task_id in bucket["id"] if task_id not in ids]
+            bucket["created_at"] = [key for key in bucket["created_at"] if key[1] not in ids]
+
+    def _index_many(self, tasks):
+        """Insert tasks into their buckets, merging large batches in one pass"""
+        for pair, members in self._group(tasks).items():
+            bucket = self.buckets[pair]
+            if len(members) * BATCH_FRACTION < len(bucket["id"]):
+                for task in members:
+                    self._index(task)
+                continue
+            for name, key in BUCKET_KEYS.items():
+                # Two sorted runs: timsort merges them in one linear pass
+                bucket[name] = sorted(chain(bucket[name], sorted(map(key, members))))
+
+    @staticmethod
+    def _group(tasks):
+        """Group tasks by (status, priority) bucket"""
+        grouped = defaultdict(list)
+        for task in tasks:
+            grouped[(task.status, task.priority)].append(task)
+        return grouped
+
+    def _unchanged(self, task_ids, expected_versions):
+        """Split task_ids into (tasks still at their expected version, ids that are not)
+
+        Ids missing from expected_versions are not checked, only looked up.
+        """
+        tasks, skipped = [], []
+        for task_id in dict.fromkeys(task_ids):
+            task = self.tasks.get(task_id)
+            expected = (expected_versions or {}).get(task_id)
+            if task is None or (expected is not None and task.version != expected):
+                skipped.append(task_id)
+            else:
+                tasks.append(task)
+        return tasks, skipped
+
+    def _check_version(self, task_id, task, expected_version):
+        """Raise ConflictError if a task is gone or no longer at expected_version"""
+        if expected_version is None:
+            return
+        if task is None:
+            raise ConflictError(task_id, f"Task {task_id} was deleted by someone else")
+        if task.version != expected_version:
+            raise ConflictError(task_id, f"Task {task_id} was changed by someone else")
+
+    def close(self):
+        """Close the underlying connection"""
+        self.conn.close()
+
+    def add(self, name, priority, status):
+        """Insert a task and return its id"""
+        with self._writing():
+            task = Task(self.next_id, name, priority, status, int(time.time()))
+            self.conn.execute(f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", task.as_row())
+            self._journal(f'Add "{task.name}"', [(task.id, None)], [task])
+            self.next_id += 1
+            self.tasks[task.id] = task
+            self._count(task, 1)
+            self._index(task)
+            self.search_index.add(task.id, task.name)
+            self.version += 1
+        return task.id
+
+    def add_many(self, rows):
+        """Insert (name, priority, status, created_at) rows in one transaction
+
+        Ids are handed out as one block. Returns the new ids.
+        """
+        with self._writing():
+            first_id = self.next_id
+            tasks = [Task(task_id, *row) for task_id, row in enumerate(rows, start=first_id)]
+            self.conn.executemany(
+                f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                (task.as_row() for task in tasks),
+            )
+            self._journal(f"Add {len(tasks)} tasks", [(task.id, None) for task in tasks], tasks)
+            self.next_id += len(tasks)
+            touched = set()
+            for task in tasks:
+                self.tasks[task.id] = task
+                self._count(task, 1)
+                # New ids are the largest yet, so the id lists stay sorted
+                bucket = self._bucket(task)
+                bucket["id"].append(task.id)
+                bucket["created_at"].append(BUCKET_KEYS["created_at"](task))
+                touched.add((task.status, task.priority))
+            for pair in touched:
+                self.buckets[pair]["created_at"].sort()
+            self.search_index.add_many((task.id, task.name) for task in tasks)
+            self.version += 1
+        return [task.id for task in tasks]
+
+    def delete(self, task_id, expected_version=None):
+        """Delete a task by ID
+
+        With expected_version, raise ConflictError unless the task is still
+        at that version.
+        """
+        with self._writing():
+            task = self.tasks.get(task_id)
+            self._check_version(task_id, task, expected_version)
+            if task is not None:
+                self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                self._journal(f'Delete "{task.name}"', [task.as_row()], [])
+                del self.tasks[task_id]
+                self._count(task, -1)
+                self._unindex(task)
+                self.search_index.remove(task_id, task.name)
+                self.version += 1
+
+    def toggle(self, task_id, expected_version=None):
+        """Toggle task status between Pending and Completed
+
+        With expected_version, raise ConflictError unless the task is still
+        at that version.
+        """
+        with self._writing():
+            task = self.tasks.get(task_id)
+            self._check_version(task_id, task, expected_version)
+            if task is None:
+                return
+            status = "Completed" if task.status == "Pending" else "Pending"
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, version = version + 1 WHERE id = ?", (status, task_id)
+            )
+            verb = "Complete" if status == "Completed" else "Reopen"
+            self._journal(f'{verb} "{task.name}"', [task.as_row()], [(task_id, task.version + 1)])
+            self.status_counts[task.status] -= 1
+            self.status_counts[status] += 1
+            self._unindex(task)
+            task.status = status
+            task.version += 1
+            self._index(task)
+            self.version += 1
+
+    def set_status_many(self, task_ids, status, expected_versions=None):
+        """Set many tasks to status in one transaction
+
+        expected_versions maps ids to the version the caller saw; tasks that
+        are gone or have changed since are left alone. Returns their ids.
+        """
+        with self._writing():
+            tasks, skipped = self._unchanged(task_ids, expected_versions)
+            tasks = [task for task in tasks if task.status != status]
+            if not tasks:
+                return skipped
+            self.conn.executemany(
+                "UPDATE tasks SET status = ?, version = version + 1 WHERE id = ?",
+                [(status, task.id) for task in tasks],
+            )
+            self._journal(
+                f"{'Complete' if status == 'Completed' else 'Reopen'} {len(tasks)} tasks",
+                [task.as_row() for task in tasks],
+                [(task.id, task.version + 1) for task in tasks],
+            )
+            self._unindex_many(tasks)
+            for task in tasks:
+                self.status_counts[task.status] -= 1
+                self.status_counts[status] += 1
+                task.status = status
+                task.version += 1
+            self._index_many(tasks)
+            self.version += 1
+        return skipped
+
+    def delete_many(self, task_ids, expected_versions=None):
+        """Delete many tasks in one transaction
+
+        expected_versions works as in set_status_many(). Returns the ids that
+        were left alone.
+        """
+        with self._writing():
+            tasks, skipped = self._unchanged(task_ids, expected_versions)
+            if not tasks:
+                return skipped
+            self.conn.executemany("DELETE FROM tasks WHERE id = ?", [(task.id,) for task in tasks])
+            self._journal(f"Delete {len(tasks)} tasks", [task.as_row() for task in tasks], [])
+            self._unindex_many(tasks)
+            for task in tasks:
+                del self.tasks[task.id]
+                self._count(task, -1)
+                self.search_index.remove(task.id, task.name)
+            self.version += 1
+        return skipped
+
+    def clear(self):
+        """Delete every task"""
+        with self._writing():
+            self.conn.execute("DELETE FROM tasks")
+            self._journal("Clear all tasks", [task.as_row() for task in self.tasks.values()], [])
+            self.tasks.clear()
+            self.status_counts = dict.fromkeys(STATUSES, 0)
+            self.priority_counts = dict.fromkeys(PRIORITIES, 0)
+            self.buckets = empty_buckets()
+            self.search_index = SearchIndex()
+            self.version += 1
+
+    def _journal(self, label, restore, expect):
+        """Record a change that undo() can reverse
+
+        restore lists what to put back: task rows, or (id, None) for tasks
+        the change created. expect lists the tasks as the change left them,
+        as Task objects or (id, version) pairs; deleted tasks are left out.
+        A new change discards anything that was undone and not redone.
+        """
+        restore = [row if row[1] is not None else (row[0], None) for row in restore]
+        expect = [(task.id, task.version) if isinstance(task, Task) else tuple(task) for task in expect]
+        # Tasks the change deleted are expected to be gone
+        present = {task_id for task_id, _ in expect}
+        expect += [(row[0], None) for row in restore if row[0] not in present]
+        self.conn.execute("DELETE FROM task_journal WHERE undone = 1")
+        cursor = self.conn.execute(
+            "INSERT INTO task_journal (label, restore, expect, created_at) VALUES (?, ?, ?, ?)",
+            (label, json.dumps(restore), json.dumps(expect), int(time.time())),
+        )
+        self.conn.execute("DELETE FROM task_journal WHERE seq <= ?", (cursor.lastrowid - JOURNAL_LIMIT,))
+
+    def _replay(self, undo, seq=None):
+        """Undo the latest change, or redo the earliest undone one; return its label
+
+        Raises ConflictError, changing nothing, if a task it touches is no
+        longer as the change (or the undo) left it, or if seq is given and
+        that entry is no longer the one to undo (or redo): someone else
+        changed the board, or undid something, since the caller looked.
+        """
+        with self._writing():
+            entry = self.conn.execute(
+                "SELECT seq, label, restore, expect FROM task_journal WHERE undone = ? ORDER BY seq "
+                + ("DESC" if undo else "ASC") + " LIMIT 1",
+                (0 if undo else 1,),
+            ).fetchone()
+            if seq is not None and (entry is None or entry["seq"] != seq):
+                raise ConflictError(None, "The board has changed since, so that change is no longer the one to "
+                                    + ("undo" if undo else "redo"))
+            if entry is None:
+                return None
+            for task_id, version in json.loads(entry["expect"]):
+                task = self.tasks.get(task_id)
+                if (None if task is None else task.version) != version:
+                    raise ConflictError(task_id, f"Task {task_id} has changed since, so this cannot be undone")
+            restore = json.loads(entry["restore"])
+            current = [self.tasks[row[0]] for row in restore if row[0] in self.tasks]
+            versions = {task.id: task.version for task in current}
+            # Tasks go back to the versions they had, so earlier journal
+            # entries still find them as they expect
+            tasks = [Task(*row) for row in restore if row[1] is not None]
+            self.conn.executemany("DELETE FROM tasks WHERE id = ?", [(task.id,) for task in current])
+            self.conn.executemany(
+                f"INSERT INTO tasks ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", [task.as_row() for task in tasks]
+            )
+            # What is there now is what the next redo (or undo) puts back
+            written = {task.id for task in tasks}
+            self.conn.execute(
+                "UPDATE task_journal SET restore = ?, expect = ?, undone = ? WHERE seq = ?",
+                (
+                    json.dumps([task.as_row() for task in current] + [
+                        (row[0], None) for row in restore if row[0] not in versions
+                    ]),
+                    json.dumps([(task.id, task.version) for task in tasks] + [
+                        (row[0], None) for row in restore if row[0] not in written
+                    ]),
+                    1 if undo else 0,
+                    entry["seq"],
+                ),
+            )
+            self._unindex_many(current)
+            for task in current:
+                del self.tasks[task.id]
+                self._count(task, -1)
+                self.search_index.remove(task.id, task.name)
+            for task in tasks:
+                self.tasks[task.id] = task
+                self._count(task, 1)
+                self.search_index.add(task.id, task.name)
+            self._index_many(tasks)
+            self.version += 1
+            return entry["label"]
+
+    def undo(self, seq=None):
+        """Undo the latest change still in the journal and return its label, or None if there is none
+
+        With seq, from history(), raises ConflictError unless that is still the latest change.
+        """
+        return self._replay(undo=True, seq=seq)
+
+    def redo(self, seq=None):
+        """Redo the change undone last and return its label, or None if there is none
+
+        With seq, from history(), raises ConflictError unless that is still the change undone last.
+        """
+        return self._replay(undo=False, seq=seq)
+
+    def history(self):
+        """Return (seq, label) of (the next change to undo, the next to redo); either may be None"""
+        with self.conn_lock:
+            undo = self.conn.execute(
+                "SELECT seq, label FROM task_journal WHERE undone = 0 ORDER BY seq DESC LIMIT 1"
+            ).fetchone()
+            redo = self.conn.execute(
+                "SELECT seq, label FROM task_journal WHERE undone = 1 ORDER BY seq ASC LIMIT 1"
+            ).fetchone()
+        return undo and tuple(undo), redo and tuple(redo)
+
+    def get(self, task_id):
+        """Return a task by ID, or None"""
+        return self.tasks.get(task_id)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def statistics(self):
+        """Return (total, completed, pending) counts"""
+        return len(self.tasks), self.status_counts["Completed"], self.status_counts["Pending"]
+
+    def check_statistics(self):
+        """Recount every task and raise AssertionError if a counter has drifted"""
+        with self.lock.read(), self.conn_lock:
+            status_counts = dict.fromkeys(STATUSES, 0)
+            priority_counts = dict.fromkeys(PRIORITIES, 0)
+            for task in self.tasks.values():
+                status_counts[task.status] += 1
+                priority_counts[task.priority] += 1
+            db_status_counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+        assert status_counts == self.status_counts, f"status counts {self.status_counts} != {status_counts}"
+        assert priority_counts == self.priority_counts, f"priority counts {self.priority_counts} != {priority_counts}"
+        assert sum(status_counts.values()) == len(self.tasks)
+        assert {k: v for k, v in status_counts.items() if v} == db_status_counts, \
+            f"database status counts {db_status_counts} != {status_counts}"
+
+    def check_indexes(self):
+        """Rebuild every bucket and the search index and raise AssertionError if one has drifted"""
+        with self.lock.read():
+            buckets = empty_buckets()
+            for task in self.tasks.values():
+                for name, key in BUCKET_KEYS.items():
+                    buckets[(task.status, task.priority)][name].append(key(task))
+            for bucket in buckets.values():
+                bucket["id"].sort()
+                bucket["created_at"].sort()
+            for pair, bucket in buckets.items():
+                assert bucket == self.buckets[pair], f"bucket {pair} out of date"
+            search_index = SearchIndex()
+            search_index.add_many((task_id, self.tasks[task_id].name) for task_id in sorted(self.tasks))
+            assert search_index.tokens == self.search_index.tokens, "search tokens out of date"
+            assert search_index.trigrams == self.search_index.trigrams, "search trigrams out of date"
+            assert search_index.vocabulary == self.search_index.vocabulary, "search vocabulary out of date"
+
+    def _ordered_ids(self, statuses, priorities, sort_option):
+        """Yield ids of the selected buckets in "Sort by" order"""
+        def by_id(status_list, priority_list):
+            return merge(*(self.buckets[(s, p)]["id"] for s in status_list for p in priority_list))
+
+        if sort_option == "Priority (High to Low)":
+            return chain.from_iterable(by_id(statuses, [p]) for p in priorities)
+        if sort_option == "Priority (Low to High)":
+            return chain.from_iterable(by_id(statuses, [p]) for p in reversed(priorities))
+        if sort_option == "Status":
+            return chain.from_iterable(by_id([s], priorities) for s in statuses)
+        if sort_option == "Date Created":
+            newest_first = merge(
+                *(reversed(self.buckets[(s, p)]["created_at"]) for s in statuses for p in priorities),
+                reverse=True,
+            )
+            return (task_id for _, task_id in newest_first)
+        return by_id(statuses, priorities)
+
+    def _search(self, search, statuses, priorities, sort_option=None, ordered=True):
+        """Return the tasks matching a search and the filters, in "Sort by" order
+
+        Returns None if the query has no terms; with ordered=False the tasks
+        come in no particular order. The latest few results are kept until
+        the data changes, so counting and paging through one search only
+        runs it once.
+        """
+        key = (search, tuple(statuses), tuple(priorities))
+        matches = self._search_memo.get(self.version, key, lambda: self._matches(search, statuses, priorities))
+        if matches is None or not ordered:
+            return matches and matches[1]
+        return self._search_memo.get(self.version, key + (sort_option,), lambda: _ordered(matches, sort_option))
+
+    def _matches(self, search, statuses, priorities):
+        """Return (relevance by id, tasks) for a search within the filters, or None if it has no terms"""
+        scores = self.search_index.search(search, lambda task_id: self.tasks[task_id].name)
+        if scores is None:
+            return None
+        status_codes = {STATUS_CODES[status] for status in statuses}
+        priority_set = set(priorities)
+        return scores, [
+            task for task in map(self.tasks.__getitem__, scores)
+            if task.status_code in status_codes and task.priority in priority_set
+        ]
+
+    def count(self, statuses=None, priorities=None, search=None):
+        """Return how many tasks match the filters and the search query"""
+        with self.lock.read():
+            if search:
+                tasks = self._search(
+                    search, STATUSES if statuses is None else statuses,
+                    PRIORITIES if priorities is None else priorities, ordered=False
+                )
+                if tasks is not None:
+                    return len(tasks)
+            return sum(
+                len(bucket["id"]) for (status, priority), bucket in self.buckets.items()
+                if (statuses is None or status in statuses) and (priorities is None or priority in priorities)
+            )
+
+    def query(self, statuses=None, priorities=None, sort_option=None, offset=0, limit=None, search=None):
+        """Return tasks matching the filters, ordered by a "Sort by" option
+
+        offset and limit select one page of the result. With a search query
+        only matching tasks are returned, by relevance unless sort_option
+        names another order.
+        """
+        # Keep the canonical order: pending before completed, priority 1 first
+        statuses = [s for s in STATUSES if statuses is None or s in statuses]
+        priorities = [p for p in PRIORITIES if priorities is None or p in priorities]
+        stop = None if limit is None else offset + limit
+        with self.lock.read():
+            tasks = self._search(search, statuses, priorities, sort_option) if search else None
+            if tasks is not None:
+                return tasks[offset:stop]
+            ids = self._ordered_ids(statuses, priorities, sort_option)
+            return [self.tasks[task_id] for task_id in islice(ids, offset, stop)]
+
+    def all_tasks(self):
+        """Return every task in insertion order"""
+        with self.lock.read():
+            return list(self.tasks.values())
@@ -0,0 +1,59 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from event_core import EventStore, get_max_days
+
+
+def random_fields(rng):
+    year, month = rng.randint(2018, 2022), rng.randint(1, 12)
+    return {
+        'name': "event", 'year': year, 'month': month, 'day': rng.randint(1, get_max_days(month, year)),
+        'category': rng.choice(["Work", "Other"]), 'priority': "Low", 'notes': "",
+    }
+
+
+def random_store(rng):
+    store = EventStore()
+    for _ in range(rng.randint(5, 60)):
+        if rng.random() < 0.5:
+            store.add(**random_fields(rng))
+        else:
+            store.add_many(random_fields(rng) for _ in range(rng.randint(1, 20)))
+        if store.by_id and rng.random() < 0.3:
+            store.edit(rng.choice(list(store.by_id)), **random_fields(rng))
+        if store.by_id and rng.random() < 0.3:
+            store.delete(rng.choice(list(store.by_id)))
+    return store
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_month_counts_and_years_match_a_scan(seed):
+    store = random_store(random.Random(seed))
+    counts = {}
+    for event in store:
+        counts[(event['year'], event['month'])] = counts.get((event['year'], event['month']), 0) + 1
+    assert store.month_counts == counts
+    assert store.years == sorted({year for year, _ in counts})
+    assert [event['date'] for event in store] == sorted(event['date'] for event in store)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_date_ranges_match_a_scan(seed):
+    rng = random.Random(seed)
+    store = random_store(rng)
+    for _ in range(10):
+        start = date(2017, 6, 1) + timedelta(rng.randint(0, 2200))
+        end = start + timedelta(rng.randint(0, 200))
+        assert store.between(start, end) == [event for event in store if start <= event['date'] <= end]
+        assert store.in_month(start.year, start.month) == [
+            event for event in store if (event['year'], event['month']) == (start.year, start.month)
+        ]
+
+
+def test_clear_empties_the_index():
+    store = EventStore([random_fields(random.Random(1)) for _ in range(5)])
+    store.clear()
+    assert store.month_counts == {} and store.years == []
+    assert store.in_month(2020, 1) == []
@@ -0,0 +1,92 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from event_core import (
+    EventStore, get_max_days, make_recurrence, nth_occurrence, occurrence_events, occurrences
+)
+
+
+def random_fields(rng):
+    year, month = rng.randint(2018, 2022), rng.randint(1, 12)
+    return {
+        'name': "event", 'year': year, 'month': month, 'day': rng.randint(1, get_max_days(month, year)),
+        'category': "Work", 'priority': "Low", 'notes': "",
+        'recurrence': make_recurrence(
+            rng.choice(["Never", "Yearly", "Monthly", "Weekly"]),
+            rng.choice([None, 1, 3, 20]),
+            rng.choice([None, date(2021, rng.randint(1, 12), rng.randint(1, 28))]),
+        ),
+    }
+
+
+def random_store(rng):
+    store = EventStore()
+    for _ in range(rng.randint(5, 30)):
+        if rng.random() < 0.5:
+            store.add(**random_fields(rng))
+        else:
+            store.add_many(random_fields(rng) for _ in range(rng.randint(1, 5)))
+        if rng.random() < 0.3:
+            store.edit(rng.choice(list(store.by_id)), **random_fields(rng))
+        if rng.random() < 0.2:
+            store.delete(rng.choice(list(store.by_id)))
+    return store
+
+
+def naive_occurrences(event, start, end):
+    rule = event['recurrence']
+    if rule is None:
+        return [event['date']] if start <= event['date'] <= end else []
+    days, n = [], 0
+    while rule['count'] is None or n < rule['count']:
+        day = nth_occurrence(event, n)
+        if day > end or (rule['until'] is not None and day > rule['until']):
+            break
+        if day >= start:
+            days.append(day)
+        n += 1
+    return days
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_occurrences_match_a_scan(seed):
+    rng = random.Random(seed)
+    store = random_store(rng)
+    assert set(store.recurring) == {event['id'] for event in store if event['recurrence']}
+    for _ in range(10):
+        start = date(2017, 1, 1) + timedelta(rng.randint(0, 2500))
+        end = start + timedelta(rng.randint(0, 400))
+        found = [(event['id'], event['date']) for event in store.between(start, end)]
+        expected = [(event['id'], day) for event in store for day in naive_occurrences(event, start, end)]
+        assert sorted(found) == sorted(expected)
+        assert [day for _, day in found] == sorted(day for _, day in found)
+        for event in store:
+            for repeat in occurrence_events(event, start, end):
+                assert repeat['id'] == event['id']
+                assert repeat['date'] == date(repeat['year'], repeat['month'], repeat['day'])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_statistics_and_years_follow_the_occurrences(seed):
+    rng = random.Random(seed)
+    store = random_store(rng)
+    today = date(2017, 1, 1) + timedelta(rng.randint(0, 2500))
+    far = date(2100, 1, 1)
+    stats = store.statistics(today)
+    upcoming = sorted(day for event in store for day in naive_occurrences(event, today, far))
+    assert [event['date'] for event in stats['timeline']] == upcoming[:len(stats['timeline'])]
+    assert stats['upcoming'] == sum(1 for event in store if naive_occurrences(event, today, far))
+    assert store.years_through(2026) == sorted(
+        {event['year'] for event in store}
+        | {day.year for event in store for day in naive_occurrences(event, date(1, 1, 1), date(2026, 12, 31))}
+    )
+
+
+def test_month_end_dates_fall_on_the_last_day_of_shorter_months():
+    event = {'date': date(2024, 1, 31), 'recurrence': make_recurrence("Monthly", count=4)}
+    assert list(occurrences(event)) == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+    leap_day = {'date': date(2024, 2, 29), 'recurrence': make_recurrence("Yearly", until=date(2028, 3, 1))}
+    assert list(occurrences(leap_day)) == [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28),
+                                           date(2027, 2, 28), date(2028, 2, 29)]
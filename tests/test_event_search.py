@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from event_core import EventStore, search_text
+from task_search import MEMO_SIZE, tokenize
+
+WORDS = ["dentist", "Dinner", "birthday", "board meeting", "re", "x1", "Déjeuner"]
+
+
+def test_search_memo_keeps_only_the_latest_results():
+    store = EventStore({
+        'name': f"meeting {i}", 'year': 2026, 'month': 1 + i % 12, 'day': 1 + i % 28,
+        'category': "Work", 'priority': "Low",
+    } for i in range(100))
+    for i in range(50):
+        assert store.search(f"meeting {i}")
+    assert len(store._search_memo.results) <= MEMO_SIZE
+    store.add("meeting late", 2026, 12, 31, "Work", "Low")
+    assert store.search("late")[0]['name'] == "meeting late"
+
+
+def random_store(rng):
+    store = EventStore()
+    for _ in range(rng.randint(5, 40)):
+        fields = {
+            'name': " ".join(rng.sample(WORDS, rng.randint(1, 2))), 'year': 2026, 'month': rng.randint(1, 12),
+            'day': rng.randint(1, 28), 'category': rng.choice(["Work", "Birthday"]), 'priority': "Low",
+            'notes': rng.choice(["", "bring the report", "call Reba"]),
+        }
+        store.add(**fields)
+        if rng.random() < 0.3:
+            store.edit(rng.choice(list(store.by_id)), **dict(fields, name=rng.choice(WORDS)))
+        if rng.random() < 0.2:
+            store.delete(rng.choice(list(store.by_id)))
+    return store
+
+
+def naive_matches(term, text):
+    """Whether every word of term starts a word of text or, from three letters, is inside one"""
+    words = tokenize(text)
+    return all(any(word.startswith(t) or (len(t) >= 3 and t in word) for word in words) for t in tokenize(term))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_a_scan(seed):
+    store = random_store(random.Random(seed))
+    for term in ["", "din", "d", "board meet", "report", "RE", "jeu", "x1", "zzz"]:
+        for category in ["All", "Work"]:
+            found = store.search(term, category)
+            expected = [
+                event for event in store
+                if naive_matches(term, search_text(event)) and category in ("All", event['category'])
+            ]
+            assert sorted(event['id'] for event in found) == sorted(event['id'] for event in expected)
+
+
+def test_better_matches_come_first_then_by_date():
+    store = EventStore()
+    store.add("dinner party", 2026, 5, 1, "Personal", "Low")
+    store.add("Dinner", 2026, 3, 1, "Personal", "Low")
+    store.add("dinnerware sale", 2026, 1, 1, "Personal", "Low")
+    store.add("dinner again", 2026, 2, 1, "Personal", "Low")
+    assert [event['name'] for event in store.search("dinner")] == [
+        "dinner again", "Dinner", "dinner party", "dinnerware sale"
+    ]
@@ -0,0 +1,50 @@
+import gc
+import os
+
+from export_jobs import ExportJobs
+from task_export import export_tasks
+from task_store import TaskStore
+
+
+def test_download_survives_another_sessions_export(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    jobs = ExportJobs()
+    store.add("first", 1, "Pending")
+    shown = jobs.submit((store.version, "CSV"), export_tasks, store, "CSV", str(tmp_path))
+    shown.future.result()
+
+    # Another session changes the board and exports it, dropping the older job
+    store.add("second", 2, "Pending")
+    jobs.discard(lambda key: key[0] == store.version)
+    jobs.submit((store.version, "CSV"), export_tasks, store, "CSV", str(tmp_path)).future.result()
+
+    data = shown.read()
+    assert b"first" in data and b"second" not in data
+
+    # Once the session lets go of the job too, its file goes
+    path = shown.path
+    del shown
+    gc.collect()
+    assert not os.path.exists(path)
+    store.close()
+
+
+def test_shared_file_stays_until_its_last_job_is_gone(tmp_path):
+    def export(progress=None):
+        path = tmp_path / "export.txt"
+        path.write_text("rows")
+        return str(path)
+
+    jobs = ExportJobs()
+    first = jobs.submit(("v1", "first"), export)
+    second = jobs.submit(("v1", "second"), export)
+    first.future.result()
+    second.future.result()
+    jobs.discard(lambda key: False)
+
+    del first
+    gc.collect()
+    assert second.read() == b"rows"
+    del second
+    gc.collect()
+    assert not (tmp_path / "export.txt").exists()
@@ -0,0 +1,37 @@
+import gc
+
+import pytest
+
+import rerun_timing
+from rerun_timing import RerunTimer
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(rerun_timing, "METRICS_DIR", str(tmp_path))
+
+
+def test_nested_timer_does_not_start_a_second_profiler():
+    page = RerunTimer("page", profile=True)
+    board = RerunTimer("board", profile=True)
+    assert page.profiler is not None
+    assert board.profiler is None and board.enabled
+    board.split("cards")
+    board.finish()
+    page.finish()
+    assert page.profile_path is not None
+    assert board.profile_path is None
+
+    after = RerunTimer("page", profile=True)
+    assert after.profiler is not None
+    after.finish()
+
+
+def test_unfinished_timer_releases_the_profiler():
+    abandoned = RerunTimer("page", profile=True)  # a rerun cut short by st.rerun() never finishes
+    abandoned.profiler.disable()
+    del abandoned
+    gc.collect()
+    timer = RerunTimer("page", profile=True)
+    assert timer.profiler is not None
+    timer.finish()
@@ -0,0 +1,65 @@
+import csv
+
+import pytest
+
+from task_cli import main
+
+
+@pytest.fixture
+def cli(tmp_path, capsys):
+    db = str(tmp_path / "tasks.db")
+
+    def run(*args):
+        main(["--db", db, *args])
+        return capsys.readouterr().out.splitlines()
+
+    return run
+
+
+def test_add_list_and_stats(cli):
+    cli("add", "write report", "--priority", "1")
+    cli("add", "book flights", "--priority", "4", "--status", "Completed")
+    listed = cli("list", "--sort", "priority-low")
+    assert [line.split()[-2:] for line in listed] == [["book", "flights"], ["write", "report"]]
+    assert [line.split()[0] for line in cli("list", "--status", "Pending")] == ["1"]
+    assert [line.split()[0] for line in cli("list", "--search", "fli")] == ["2"]
+    assert cli("stats") == ["Total: 2  Completed: 1  Pending: 1"]
+
+
+def test_bulk_changes_and_undo_redo(cli):
+    for name in ("a", "b", "c"):
+        cli("add", name)
+    cli("complete", "1", "2")
+    assert cli("stats") == ["Total: 3  Completed: 2  Pending: 1"]
+    cli("delete", "2", "3")
+    assert cli("undo") == ["Undid: Delete 2 tasks"]
+    assert cli("undo") == ["Undid: Complete 2 tasks"]
+    assert cli("redo") == ["Redid: Complete 2 tasks"]
+    cli("toggle", "1")
+    assert cli("stats") == ["Total: 3  Completed: 1  Pending: 2"]
+    cli("clear")
+    assert cli("stats") == ["Total: 0  Completed: 0  Pending: 0"]
+
+
+def test_unknown_ids_and_empty_names_are_refused(cli):
+    cli("add", "only")
+    with pytest.raises(SystemExit, match="No task with id 7, 9"):
+        cli("delete", "1", "7", "9")
+    with pytest.raises(SystemExit, match="No task with id 5"):
+        cli("toggle", "5")
+    with pytest.raises(SystemExit, match="cannot be empty"):
+        cli("add", "  ")
+    assert cli("stats") == ["Total: 1  Completed: 0  Pending: 1"]
+
+
+def test_export_then_import(cli, tmp_path):
+    cli("add", "keep me", "--priority", "2")
+    path = tmp_path / "tasks.csv"
+    cli("export", str(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        assert [row["name"] for row in csv.DictReader(f)] == ["keep me"]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("9,bad,7,Pending,2024-01-01 00:00:00\n")
+    output = cli("import", str(path))
+    assert output[0] == "Imported 1 tasks, rejected 1 rows"
+    assert cli("stats") == ["Total: 2  Completed: 0  Pending: 2"]
@@ -0,0 +1,67 @@
+import csv
+from datetime import datetime, timezone
+
+import pytest
+
+from task_export import FIELDS, WRITERS, export_tasks, iter_chunks
+from task_store import TaskStore, format_created_at
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_export_writes_the_rows_as_they_were_when_it_started(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    ids = [store.add(f"task {i}", 1, "Pending") for i in range(5)]
+
+    def complete_everything(done, total):
+        # Another session completes the tasks while the export is being written
+        if done == 0:
+            store.set_status_many(ids, "Completed")
+
+    path = export_tasks(store, "CSV", str(tmp_path), statuses=["Pending"], progress=complete_everything)
+    assert [row["status"] for row in read_csv(path)] == ["Pending"] * 5
+    store.close()
+
+
+ROWS = [(i, f"task {i}", 1 + i % 5, ("Pending", "Completed")[i % 2], 1700000000 + i, 1) for i in range(25)]
+
+
+def test_chunks_cover_the_rows_and_report_progress():
+    reported = []
+    chunks = list(iter_chunks(ROWS, chunk_size=10, progress=lambda done, total: reported.append((done, total))))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [row for chunk in chunks for row in chunk] == ROWS
+    assert reported == [(0, 25), (10, 25), (20, 25), (25, 25)]
+
+
+def test_csv_has_the_export_columns(tmp_path):
+    path = tmp_path / "tasks.csv"
+    WRITERS["CSV"](ROWS, path)
+    rows = read_csv(path)
+    assert list(rows[0]) == FIELDS
+    assert rows[3] == {"id": "3", "name": "task 3", "priority": "4", "status": "Completed",
+                       "created_at": format_created_at(1700000003)}
+
+
+@pytest.mark.parametrize("export_format", ["Parquet", "Arrow IPC"])
+def test_arrow_formats_keep_the_schema(tmp_path, export_format):
+    pa = pytest.importorskip("pyarrow")
+    path = str(tmp_path / "tasks")
+    WRITERS[export_format](ROWS, path)
+    if export_format == "Parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.schema.names == FIELDS
+    assert table.schema.field("priority").type == pa.int8()
+    # Parquet has no second-resolution timestamps, so those come back in milliseconds
+    created_at = table.schema.field("created_at").type
+    assert pa.types.is_timestamp(created_at) and created_at.tz == "UTC"
+    assert table.num_rows == len(ROWS)
+    first = table.slice(0, 1).to_pylist()[0]
+    assert first == {"id": 0, "name": "task 0", "priority": 1, "status": "Pending",
+                     "created_at": datetime.fromtimestamp(1700000000, timezone.utc)}
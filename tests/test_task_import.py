@@ -0,0 +1,72 @@
+import io
+import json
+import time
+
+from task_import import import_tasks, read_tasks_file, validate_tasks
+from task_store import TaskStore, format_created_at
+
+
+def validate_csv(text):
+    return validate_tasks(read_tasks_file(io.StringIO(text), "tasks.csv"))
+
+
+def test_rejected_rows_give_their_reasons():
+    rows, rejected = validate_csv(
+        "name,priority,status\n"
+        "ok,1,Pending\n"
+        " ,2,Pending\n"
+        "high,6,Pending\n"
+        "odd,3,Started\n"
+    )
+    assert rows[0][:3] == ("ok", 1, "Pending")
+    assert rejected["row"].tolist() == [2, 3, 4]
+    assert rejected["reason"].tolist() == ["empty name", "priority must be 1-5", "status must be Pending or Completed"]
+
+
+def test_timestamps_outside_the_displayable_range_are_rejected():
+    rows, rejected = validate_csv(
+        "name,priority,status,created_at\n"
+        "seconds,1,Pending,1792353707\n"
+        "millis,1,Pending,1792353707000\n"
+        "negative,1,Pending,-5\n"
+        "infinite,1,Pending,inf\n"
+        "garbage,1,Pending,yesterday\n"
+    )
+    assert rows == [("seconds", 1, "Pending", 1792353707)]
+    assert rejected["name"].tolist() == ["millis", "negative", "infinite", "garbage"]
+    assert set(rejected["reason"]) == {"invalid created_at"}
+
+
+def test_export_timestamps_are_read_as_local_time():
+    rows, rejected = validate_csv(
+        "name,priority,status,created_at\n"
+        "iso,1,Pending,2024-07-01 12:00:00\n"
+        "blank,1,Pending,\n"
+    )
+    assert rejected.empty
+    assert rows[0][3] == int(time.mktime((2024, 7, 1, 12, 0, 0, 0, 0, -1)))
+    assert abs(rows[1][3] - time.time()) < 60
+
+
+def test_json_column_may_mix_numbers_and_text():
+    records = [
+        {"name": "number", "priority": 1, "status": "Pending", "created_at": 1792353707},
+        {"name": "text", "priority": 2, "status": "Completed", "created_at": "2024-07-01 12:00:00"},
+        {"name": "missing", "priority": 3, "status": "Pending", "created_at": None},
+        {"name": "millis", "priority": 4, "status": "Pending", "created_at": 1792353707000},
+    ]
+    rows, rejected = validate_tasks(read_tasks_file(io.StringIO(json.dumps(records)), "tasks.json"))
+    assert [row[0] for row in rows] == ["number", "text", "missing"]
+    assert rows[0][3] == 1792353707
+    assert rows[1][3] == int(time.mktime((2024, 7, 1, 12, 0, 0, 0, 0, -1)))
+    assert rejected["name"].tolist() == ["millis"]
+
+
+def test_imported_tasks_can_be_shown(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    csv = "name,priority,status,created_at\nz,1,Pending,1792353707000\nok,1,Pending,1792353707\n"
+    ids, rejected = import_tasks(store, io.StringIO(csv), "tasks.csv")
+    assert len(ids) == 1 and len(rejected) == 1
+    for task in store.all_tasks():
+        format_created_at(task.created_at)
+    store.close()
@@ -0,0 +1,44 @@
+import os
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from task_store import TaskStore
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "task_manager.py")
+SORT_OPTIONS = [None, "Priority (High to Low)", "Priority (Low to High)", "Status", "Date Created"]
+
+
+def test_pages_are_slices_of_the_whole_result(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    store.add_many([(f"task {i}", 1 + i % 5, ("Pending", "Completed")[i % 3 == 0], i % 7) for i in range(95)])
+    for statuses in (None, ["Pending"]):
+        for sort_option in SORT_OPTIONS:
+            everything = store.query(statuses, sort_option=sort_option)
+            assert store.count(statuses) == len(everything)
+            pages = [store.query(statuses, sort_option=sort_option, offset=offset, limit=25)
+                     for offset in range(0, len(everything) + 25, 25)]
+            assert [task for page in pages for task in page] == everything
+            assert pages[-1] == []
+    store.close()
+
+
+def test_page_past_the_end_is_clamped_when_the_filters_shrink(tmp_path, monkeypatch):
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(path)
+    store.add_many([(f"task {i}", 3, "Pending", i) for i in range(30)])
+    store.add_many([(f"done {i}", 3, "Completed", i) for i in range(3)])
+    store.close()
+    monkeypatch.setenv("TASK_MANAGER_DB", path)
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    [box for box in at.selectbox if box.label == "Tasks per page:"][0].set_value(10).run()
+    at.number_input(key="task_page").set_value(4).run()
+    assert at.number_input(key="task_page").value == 4
+
+    at.multiselect(key="filter_status").set_value(["Completed"]).run()
+    assert not at.exception
+    assert at.number_input(key="task_page").value == 1
+    assert "Showing 1–3 of 3 tasks" in [caption.value for caption in at.caption]
+    st.cache_resource.clear()
@@ -0,0 +1,83 @@
+import random
+
+from task_search import EXACT, MEMO_SIZE, PREFIX, SUBSTRING, SearchIndex, SearchMemo, tokenize
+from task_store import TaskStore
+
+
+def test_search_memo_keeps_only_the_latest_results(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    store.add_many([(f"report {i}", 1 + i % 5, "Pending", i) for i in range(200)])
+    for i in range(50):
+        assert store.count(search=f"report {i}") >= 1
+        store.query(search=f"report {i}", sort_option="Status")
+    assert len(store._search_memo.results) <= MEMO_SIZE
+    store.close()
+
+
+def test_search_memo_forgets_results_when_the_version_changes():
+    memo = SearchMemo(size=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert memo.get(1, "a", lambda: compute("a")) == "a"
+    assert memo.get(1, "a", lambda: compute("a again")) == "a"
+    memo.get(1, "b", lambda: compute("b"))
+    memo.get(1, "a", lambda: compute("a again"))  # a is now the most recent
+    memo.get(1, "c", lambda: compute("c"))  # so b goes
+    assert list(memo.results) == ["a", "c"]
+    assert memo.get(2, "a", lambda: compute("a at 2")) == "a at 2"
+    assert calls == ["a", "b", "c", "a at 2"]
+
+
+def index_of(names):
+    index = SearchIndex()
+    for task_id, name in names.items():
+        index.add(task_id, name)
+    return index
+
+
+def test_exact_words_outrank_prefixes_which_outrank_substrings():
+    names = {1: "misreport", 2: "reporting", 3: "Report", 4: "deploy"}
+    assert index_of(names).search("report", names.__getitem__) == {1: SUBSTRING, 2: PREFIX, 3: EXACT}
+
+
+def test_every_term_must_match_and_scores_add_up():
+    names = {1: "weekly report", 2: "report draft", 3: "weekly standup"}
+    assert index_of(names).search("week rep", names.__getitem__) == {1: PREFIX + PREFIX}
+    assert index_of(names).search("report dra", names.__getitem__) == {2: EXACT + PREFIX}
+    assert index_of(names).search("  --  ", names.__getitem__) is None
+
+
+def test_short_terms_only_match_word_starts():
+    names = {1: "rerun", 2: "error"}
+    assert index_of(names).search("re", names.__getitem__) == {1: PREFIX}
+
+
+def naive_score(term, name):
+    scores = [
+        EXACT if word == term else PREFIX if word.startswith(term) else SUBSTRING
+        for word in tokenize(name) if word.startswith(term) or (len(term) >= 3 and term in word)
+    ]
+    return max(scores, default=0)
+
+
+def test_store_ranks_search_results_like_a_scan(tmp_path):
+    rng = random.Random(3)
+    words = ["report", "Reporting", "meet", "meeting", "re", "deploy", "Déploy", "x1"]
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    store.add_many([(" ".join(rng.sample(words, rng.randint(1, 3))), 1, "Pending", i) for i in range(300)])
+    for _ in range(100):
+        store.toggle(rng.choice(list(store.tasks)))
+    for query in ["rep", "re", "report", "meet ing", "dép", "ort", "x1", "zzz"]:
+        terms = tokenize(query)
+        expected = {}
+        for task in store.all_tasks():
+            scores = [naive_score(term, task.name) for term in terms]
+            if all(scores):
+                expected[task.id] = sum(scores)
+        ranked = sorted(expected, key=lambda task_id: (-expected[task_id], task_id))
+        assert [task.id for task in store.query(search=query)] == ranked
+    store.close()
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from task_store import ConflictError, TaskStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+
+def snapshot(store):
+    return sorted(task.as_row() for task in store.tasks.values())
+
+
+def test_undo_redo_round_trip(store):
+    first = store.add("first", 1, "Pending")
+    second = store.add("second", 3, "Pending")
+    states = [snapshot(store)]
+    store.toggle(first)
+    states.append(snapshot(store))
+    store.set_status_many([first, second], "Completed")
+    states.append(snapshot(store))
+    store.delete(second)
+    states.append(snapshot(store))
+
+    for state in reversed(states[:-1]):
+        seq, label = store.history()[0]
+        assert store.undo(seq) == label
+        assert snapshot(store) == state
+    for state in states[1:]:
+        seq, label = store.history()[1]
+        assert store.redo(seq) == label
+        assert snapshot(store) == state
+    assert store.history()[1] is None
+    store.check_statistics()
+    store.check_indexes()
+
+
+def test_undo_is_refused_once_another_change_is_on_top(store):
+    task_id = store.add("task", 1, "Pending")
+    seq, _ = store.history()[0]
+    store.toggle(task_id)  # another session changes the board first
+    before = snapshot(store)
+
+    with pytest.raises(ConflictError):
+        store.undo(seq)
+    assert snapshot(store) == before
+
+
+def test_undo_is_refused_once_another_session_undid_it(store):
+    store.add("task", 1, "Pending")
+    seq, _ = store.history()[0]
+    store.undo()
+
+    with pytest.raises(ConflictError):
+        store.undo(seq)
+    assert store.tasks == {}
+
+
+def test_redo_is_refused_once_another_change_is_first(store):
+    task_id = store.add("task", 1, "Pending")
+    store.toggle(task_id)
+    store.undo()
+    seq, _ = store.history()[1]
+    store.undo()  # now the add is the one to redo
+    before = snapshot(store)
+
+    with pytest.raises(ConflictError):
+        store.redo(seq)
+    assert snapshot(store) == before
+
+
+def test_random_changes_keep_counts_and_indexes_in_step(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(path)
+    rng = random.Random(7)
+    words = ["report", "meeting", "deploy", "invoice", "re", "x1"]
+    for step in range(400):
+        ids = list(store.tasks)
+        name = " ".join(rng.sample(words, rng.randint(1, 3)))
+        action = rng.random()
+        try:
+            if action < 0.25 or not ids:
+                store.add(name, rng.randint(1, 5), rng.choice(["Pending", "Completed"]))
+            elif action < 0.35:
+                store.add_many([(name, rng.randint(1, 5), "Pending", step) for _ in range(rng.randint(1, 5))])
+            elif action < 0.5:
+                store.toggle(rng.choice(ids))
+            elif action < 0.6:
+                store.delete(rng.choice(ids))
+            elif action < 0.65:
+                store.set_status_many(rng.sample(ids, min(3, len(ids))), rng.choice(["Pending", "Completed"]))
+            elif action < 0.7:
+                store.delete_many(rng.sample(ids, min(3, len(ids))))
+            elif action < 0.8:
+                store.undo()
+            elif action < 0.9:
+                store.redo()
+            elif action < 0.95:
+                store.load()
+            else:
+                before = snapshot(store)
+                store.close()
+                store = TaskStore(path)
+                assert snapshot(store) == before
+        except ConflictError:
+            pass
+        store.check_statistics()
+        store.check_indexes()
+    store.close()